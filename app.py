@@ -1,14 +1,211 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, Request, Response, g, render_template, request, jsonify, redirect, url_for
+import json
 import os
+import threading
+import time
+import zipfile
 from database import PinPuttDB
+from sqlite_db import SQLitePinPuttDB
+from changefeed import ChangeFeed
+from events import DEFAULT_EVENT, EventRegistry, UnknownEvent
+from http_cache import VersionedResponseCache
 from functools import wraps
 from config import Config
 from werkzeug.utils import secure_filename
-from ocr import OCRSpaceAPI, OCRConfig
+from metrics import CONTENT_TYPE, REGISTRY, SamplingProfiler, current_stages, finish_request, stage, start_request
+from ocr import OCRSpaceAPI, OCRConfig, TieredOCR, record_result
+from local_ocr import DigitTemplateOCR
+from ocr_cache import OCRResultCache
+from ocr_jobs import OCRJobQueue, QueueFull
+from ocr_batch import BatchOCR, iter_zip, stream_ndjson
+from upload_intake import UploadRejected, inspect_image, upload_stream
+
+# Request body limits of the routes allowed more than MAX_CONTENT_LENGTH, by endpoint
+BODY_LIMITS = {'process_image_batch': Config.OCR_BATCH_MAX_UPLOAD_BYTES}
+
+class UploadIntakeRequest(Request):
+    # Each uploaded file gets its own buffer: UPLOAD_SPOOL_BYTES in memory,
+    # then an anonymous temp file in UPLOADS_DIR. Photos are checked as
+    # they stream in, see upload_intake.
+    @property
+    def max_content_length(self):
+        return BODY_LIMITS.get(self.endpoint, super().max_content_length)
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return upload_stream(filename, Config.ALLOWED_EXTENSIONS, Config.UPLOAD_MAX_BYTES,
+                             Config.UPLOAD_SPOOL_BYTES, Config.UPLOADS_DIR)
 
 app = Flask(__name__)
+app.request_class = UploadIntakeRequest
 app.config.from_object(Config)
-db = PinPuttDB(Config.DATA_DIR)
+
+def open_event_db(data_dir):
+    if Config.DB_BACKEND == 'sqlite':
+        return SQLitePinPuttDB(os.path.join(data_dir, 'scores.db'))
+    return PinPuttDB(
+        data_dir,
+        reload_interval=Config.DB_RELOAD_INTERVAL,
+        journal=Config.DB_JOURNAL,
+        compact_bytes=Config.DB_JOURNAL_COMPACT_BYTES
+    )
+
+if Config.DB_BACKEND == 'sqlite':
+    db = SQLitePinPuttDB(Config.DB_SQLITE_FILE or os.path.join(Config.DATA_DIR, 'scores.db'))
+else:
+    db = open_event_db(Config.DATA_DIR)
+events = EventRegistry(Config.DATA_DIR, db, open_event_db)
+# Summarize archives not yet indexed: those from before the index existed,
+# or written by a reset that crashed before its index line
+events.sync_index()
+
+# One change feed per event, created with its first stream
+feeds = {}
+feeds_lock = threading.Lock()
+
+def event_feed(slug):
+    with feeds_lock:
+        feed = feeds.get(slug)
+        if feed is None:
+            store = events.get(slug)
+            feed = feeds[slug] = ChangeFeed(
+                store.poll_changes,
+                max_clients=Config.SSE_MAX_CLIENTS,
+                heartbeat=Config.SSE_HEARTBEAT_SECONDS,
+                max_duration=Config.SSE_MAX_DURATION_SECONDS
+            )
+            store.add_listener(feed.publish)
+        return feed
+
+response_cache = VersionedResponseCache()
+
+# Set in the WSGI environ by asgi.py; a streaming view stores an async
+# iterator of its body here for the event loop to send
+ASYNC_BODY = 'pinputt.async_body'
+# Set by asgi.py, which takes the upload slot before receiving the body:
+# True when it holds one for this request, False when none was free
+UPLOAD_SLOT = 'pinputt.upload_slot'
+
+ocr_config = OCRConfig(
+    pro_key=Config.OCR_PRO_KEY,
+    free_key=Config.OCR_FREE_KEY,
+    debug=Config.OCR_DEBUG,
+    timeout=Config.OCR_TIMEOUT,
+    hedge=Config.OCR_HEDGE,
+    hedge_after=Config.OCR_HEDGE_AFTER,
+    # Each job may have every endpoint in flight at once
+    pool_size=Config.OCR_WORKERS * 3,
+    min_score_length=Config.OCR_MIN_SCORE_LENGTH,
+    max_score_length=Config.OCR_MAX_SCORE_LENGTH,
+    response_dir=Config.OCR_RESPONSE_DIR,
+    endpoint_urls=Config.OCR_ENDPOINT_URLS,
+    async_pool_size=Config.OCR_ASYNC_POOL_SIZE
+)
+local_reader = None
+if Config.OCR_LOCAL or Config.OCR_CACHE_PERCEPTUAL:
+    local_reader = DigitTemplateOCR(
+        min_digits=Config.OCR_MIN_SCORE_LENGTH,
+        max_digits=Config.OCR_MAX_SCORE_LENGTH,
+        debug=Config.OCR_DEBUG
+    )
+ocr_cache = OCRResultCache(
+    max_entries=Config.OCR_CACHE_SIZE,
+    disk_dir=os.path.join(Config.DATA_DIR, 'ocr_cache') if Config.OCR_CACHE_DISK else None,
+    disk_ttl=Config.OCR_CACHE_TTL,
+    disk_max_bytes=Config.OCR_CACHE_DISK_BYTES,
+    perceptual=Config.OCR_CACHE_PERCEPTUAL,
+    # A look-alike photo is only answered from the cache when it reads the same
+    reader=local_reader
+)
+ocr_api = OCRSpaceAPI(ocr_config, cache=ocr_cache)
+# OCR.space is only called with a key; the offline reader needs none
+remote_ocr = ocr_api if Config.OCR_PRO_KEY else None
+if Config.OCR_LOCAL:
+    # Read the score offline first; OCR.space only sees the photos it cannot read
+    engines = [local_reader, remote_ocr] if remote_ocr is not None else [local_reader]
+    ocr_engine = TieredOCR(engines, Config.OCR_CONFIDENCE_THRESHOLD, debug=Config.OCR_DEBUG)
+else:
+    ocr_engine = ocr_api
+
+def run_ocr_job(job):
+    return ocr_job_result(job, ocr_engine.extract_text(job.image, job.timings))
+
+def ocr_job_result(job, result):
+    app.logger.info(f"OCR job {job.id} result: {result}")
+    record_result(result, job.timings)
+    if result is None:
+        return None
+    return {
+        'score': result.score,
+        'confidence': result.confidence,
+        'endpoint_used': result.endpoint_used,
+        'strategy': result.strategy_used,
+        'candidates': result.candidates
+    }
+
+# Uploads being read and checked; the OCR queue bounds the work after that
+upload_slots = threading.BoundedSemaphore(Config.UPLOAD_MAX_IN_FLIGHT)
+
+ocr_jobs = OCRJobQueue(
+    run_ocr_job,
+    os.path.join(Config.DATA_DIR, 'ocr_jobs'),
+    workers=Config.OCR_WORKERS,
+    max_queue=Config.OCR_QUEUE_SIZE,
+    result_ttl=Config.OCR_JOB_TTL
+)
+
+HTTP_SECONDS = REGISTRY.histogram(
+    'pinputt_http_request_duration_seconds', 'Time to produce each response, by route', ('method', 'route', 'status'))
+UPLOADS_REJECTED = REGISTRY.counter(
+    'pinputt_uploads_rejected_total', 'Photo uploads refused before reaching the OCR queue, by reason', ('reason',))
+REGISTRY.gauge('pinputt_ocr_queue_depth', 'OCR jobs waiting for a worker',
+               lambda: {(): ocr_jobs.stats()['queue_depth']})
+REGISTRY.gauge('pinputt_sse_clients', 'Open live leaderboard streams in this process, by event',
+               lambda: {(slug,): feed.clients for slug, feed in list(feeds.items())}, ('event',))
+
+@app.before_request
+def start_request_timing():
+    g.started = time.perf_counter()
+    g.stages_token = start_request()
+    g.profiler = None
+    if Config.PROFILE_REQUESTS and request.args.get('profile') == '1' and request.args.get('key') == app.config['ADMIN_KEY']:
+        g.profiler = SamplingProfiler().start()
+
+@app.after_request
+def add_request_timing(response):
+    elapsed = time.perf_counter() - g.started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_SECONDS.observe(elapsed, method=request.method, route=route, status=str(response.status_code))
+    stages = current_stages()
+    # Streamed bodies are still being produced; their total is time to first byte
+    response.headers['Server-Timing'] = ', '.join(
+        [f'{name};dur={seconds * 1000:.2f}' for name, seconds in stages.items()] + [f'total;dur={elapsed * 1000:.2f}'])
+    if g.profiler is not None:
+        g.profiler.stop()
+        profile_dir = os.path.join(Config.DATA_DIR, 'profiles')
+        os.makedirs(profile_dir, exist_ok=True)
+        profile_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unmatched'}.folded"
+        with open(os.path.join(profile_dir, profile_name), 'w', encoding='utf-8') as f:
+            f.write(g.profiler.collapsed())
+        g.profiler = None
+        response.headers['X-Profile'] = profile_name
+    if Config.REQUEST_TIMING_LOG:
+        app.logger.info(json.dumps({
+            'method': request.method,
+            'route': route,
+            'status': response.status_code,
+            'seconds': round(elapsed, 6),
+            'stages': {name: round(seconds, 6) for name, seconds in stages.items()}
+        }))
+    return response
+
+@app.teardown_request
+def finish_request_timing(exc):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+    token = g.pop('stages_token', None)
+    if token is not None:
+        finish_request(token)
 
 def admin_required(f):
     @wraps(f)
@@ -19,17 +216,56 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def request_event():
+    """Slug of the event a request is for: ?event= or form field, else the default event."""
+    return request.values.get('event') or DEFAULT_EVENT
+
+def event_db():
+    return events.get(request_event())
+
+@app.errorhandler(UnknownEvent)
+def unknown_event(e):
+    return jsonify({'status': 'error', 'message': f'Unknown event {e.args[0]}'}), 404
+
+@app.errorhandler(UploadRejected)
+def upload_rejected(e):
+    # Raised wherever the form is first parsed, mid-stream for a bad photo
+    app.logger.error(f"Rejected upload: {e}")
+    UPLOADS_REJECTED.inc(reason=e.reason)
+    return jsonify({'error': str(e)}), e.status
+
+def cached_json(key, build):
+    """JSON response served from the version-keyed cache, honouring If-None-Match."""
+    store = event_db()
+    def render():
+        with stage('response_build'):
+            return app.json.dumps(build(store)).encode('utf-8')
+    entry = response_cache.get((request_event(),) + key, store.version, render)
+    headers = {'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    if request.if_none_match.contains(entry.etag):
+        response = Response(status=304, headers=headers)
+    else:
+        body = entry.body
+        if request.accept_encodings['gzip']:
+            gzipped = response_cache.gzipped(entry)
+            if gzipped is not None:
+                body = gzipped
+                headers['Content-Encoding'] = 'gzip'
+        response = Response(body, mimetype='application/json', headers=headers)
+    response.set_etag(entry.etag)
+    return response
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
 
 @app.route('/')
 def home():
-    return render_template('index.html', target=db.get_current_target())
+    return render_template('index.html', target=event_db().get_current_target())
 
 @app.route('/admin')
 @admin_required
 def admin():
-    return render_template('admin.html', target=db.get_current_target())
+    return render_template('admin.html', target=event_db().get_current_target())
 
 @app.route('/player/<initials>')
 def player_detail(initials):
@@ -38,9 +274,10 @@ def player_detail(initials):
 @app.route('/api/target', methods=['POST'])
 @admin_required
 def set_target():
+    store = event_db()
     try:
         target = int(request.form.get('target', 0))
-        db.set_target(target)
+        store.set_target(target)
         return jsonify({'status': 'success', 'target': target})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 400
@@ -49,20 +286,23 @@ def set_target():
 @admin_required
 def reset_scores():
     try:
-        archive_file = db.reset_scores()
+        archive_file = events.reset(request_event())
         return jsonify({
             'status': 'success',
             'message': f'Scores archived to {os.path.basename(archive_file)}'
         })
+    except UnknownEvent:
+        raise
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 400
 
 @app.route('/api/score', methods=['POST'])
 def submit_score():
+    store = event_db()
     try:
         initials = request.form.get('initials', '').upper()
         score = int(request.form.get('score', 0))
-        attempt = db.add_attempt(initials, score)
+        attempt = store.add_attempt(initials, score)
         return jsonify({'status': 'success', 'attempt': attempt})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 400
@@ -73,10 +313,27 @@ def submit_score():
 @app.route('/api/process_image', methods=['POST'])
 def process_image():
     app.logger.info("Starting image processing")
-    if not Config.OCR_PRO_KEY:
-        app.logger.error("No OCR API keys found")
+    if remote_ocr is None and not Config.OCR_LOCAL:
+        app.logger.error("No OCR API keys found and the local reader is off")
         return jsonify({'error': 'OCR API keys not configured'}), 500
-        
+    
+    # Checked before the body is read, so a refused upload costs nothing
+    held_by_server = UPLOAD_SLOT in request.environ
+    if held_by_server:
+        has_slot = request.environ[UPLOAD_SLOT]
+    else:
+        has_slot = upload_slots.acquire(blocking=False)
+    if not has_slot:
+        UPLOADS_REJECTED.inc(reason='busy')
+        return jsonify({'error': 'Too many uploads in progress, please try again'}), 429, {'Retry-After': '2'}
+    try:
+        return queue_uploaded_image()
+    finally:
+        if not held_by_server:
+            upload_slots.release()
+
+def queue_uploaded_image():
+    started = time.perf_counter()
     file = request.files['image']
     app.logger.info(f"Received file: {file.filename if file else 'No file'}")
     
@@ -87,73 +344,192 @@ def process_image():
     if not allowed_file(file.filename):
         app.logger.error(f"Invalid file type: {file.filename}")
         return jsonify({'error': 'Invalid file type'}), 400
-        
+    
+    image_format, width, height = inspect_image(file.stream, Config.UPLOAD_MAX_PIXELS)
     try:
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(Config.UPLOADS_DIR, filename)
-        app.logger.info(f"About to save file to: {filepath}")
-        file.save(filepath)
-        app.logger.info(f"File saved successfully")
-        
-        # Verify file exists and has size
-        if os.path.exists(filepath):
-            size = os.path.getsize(filepath)
-            app.logger.info(f"File size: {size} bytes")
-        else:
-            app.logger.error("File does not exist after save")
-            return jsonify({'error': 'File save failed'}), 500
-        
-        ocr_config = OCRConfig(
-            pro_key=Config.OCR_PRO_KEY,
-            free_key=Config.OCR_FREE_KEY,
-            debug=Config.OCR_DEBUG
-        )
-        ocr = OCRSpaceAPI(ocr_config)
+        image = file.read()
+        read_seconds = time.perf_counter() - started
+        app.logger.info(f"Read {len(image)} bytes ({image_format} {width}x{height}) from {secure_filename(file.filename)}")
         
-        app.logger.info("Starting OCR processing")
-        result = ocr.extract_text(filepath)
-        app.logger.info(f"OCR result: {result}")
-        
-        if result is None:
-            app.logger.error("No score detected")
-            return jsonify({'error': 'Could not detect score'}), 400
-            
+        job = ocr_jobs.submit(ocr_jobs.new_job_id(), image, {'read': read_seconds})
+        app.logger.info(f"Queued OCR job {job.id}")
         return jsonify({
-            'score': result.score,
-            'confidence': result.confidence,
-            'endpoint_used': result.endpoint_used,
-            'strategy': result.strategy_used
-        })
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': url_for('process_image_status', job_id=job.id)
+        }), 202
         
+    except QueueFull as e:
+        app.logger.error(str(e))
+        return jsonify({'error': 'Too many images being processed, please try again'}), 503, {'Retry-After': '5'}
     except Exception as e:
-        app.logger.error(f"Error processing image: {str(e)}")
+        app.logger.error(f"Error queueing image: {str(e)}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            app.logger.info("Cleaned up uploaded file")
-            
+
+@app.route('/api/batch/process_images', methods=['POST'])
+@admin_required
+def process_image_batch():
+    """Read many score photos, streaming one NDJSON line per image as it finishes.
+
+    Takes image files under 'images', or one zip under 'archive'. Photos
+    named <INITIALS>_*.jpg are added as attempts when commit=1 and their
+    confidence reaches min_confidence. Camera names such as IMG_0001.jpg
+    carry no initials, so those photos are read but never committed.
+    """
+    if remote_ocr is None and not Config.OCR_LOCAL:
+        return jsonify({'error': 'OCR API keys not configured'}), 500
+    store = event_db()
+    
+    try:
+        # Read everything now; the stream runs after the request is torn down
+        images = []
+        for file in request.files.getlist('images'):
+            if file.filename and allowed_file(file.filename):
+                images.append((secure_filename(file.filename), file.read()))
+        archive = request.files.get('archive')
+        if archive is not None:
+            images.extend(iter_zip(archive.stream, Config.ALLOWED_EXTENSIONS, Config.MAX_CONTENT_LENGTH,
+                                   Config.OCR_BATCH_MAX_IMAGES, Config.OCR_BATCH_MAX_BYTES))
+    except (ValueError, zipfile.BadZipFile) as e:
+        return jsonify({'error': str(e)}), 400
+    if not images:
+        return jsonify({'error': 'No images uploaded'}), 400
+    
+    commit = request.args.get('commit') == '1'
+    min_confidence = request.args.get('min_confidence', Config.OCR_CONFIDENCE_THRESHOLD, type=float)
+    app.logger.info(f"Batch of {len(images)} images, commit={commit}")
+    batch = BatchOCR(
+        remote_ocr,
+        processes=min(Config.OCR_BATCH_PROCESSES, len(images)),
+        threads=Config.OCR_WORKERS,
+        local=Config.OCR_LOCAL,
+        confidence_threshold=Config.OCR_CONFIDENCE_THRESHOLD,
+        min_digits=Config.OCR_MIN_SCORE_LENGTH,
+        max_digits=Config.OCR_MAX_SCORE_LENGTH
+    )
+    return Response(
+        stream_ndjson(batch, images, store if commit else None, min_confidence),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/process_image/<job_id>')
+def process_image_status(job_id):
+    job = ocr_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    response = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'timings': {stage: round(seconds, 3) for stage, seconds in job['timings'].items()}
+    }
+    if 'queue_position' in job:
+        response['queue_position'] = job['queue_position']
+    if job['result']:
+        response.update(job['result'])
+    if job['error']:
+        response['error'] = job['error']
+    return jsonify(response)
+
+@app.route('/api/ocr/queue')
+@admin_required
+def ocr_queue_stats():
+    stats = ocr_jobs.stats()
+    stats['endpoints'] = ocr_api.endpoint_stats()
+    stats['cache'] = ocr_cache.stats()
+    return jsonify(stats)
+
 @app.route('/api/leaderboard')
 def get_leaderboard():
-    target = db.get_current_target()
-    leaderboard = db.get_leaderboard()
-    return jsonify({'target': target, 'leaderboard': leaderboard})
+    limit = request.args.get('limit', type=int)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    if limit is not None:
+        limit = max(limit, 0)
+    return cached_json(('leaderboard', limit, offset), lambda store: {
+        'target': store.get_current_target(),
+        'leaderboard': store.get_leaderboard(limit=limit, offset=offset),
+        'total': store.get_leaderboard_count(),
+        'offset': offset
+    })
+
+@app.route('/api/leaderboard/stream')
+def leaderboard_stream():
+    feed = event_feed(request_event())
+    if not feed.try_connect():
+        # Clients fall back to polling /api/leaderboard
+        return jsonify({'error': 'Too many live connections'}), 503, {'Retry-After': '60'}
+    last_event_id = request.headers.get('Last-Event-ID')
+    if ASYNC_BODY in request.environ:
+        request.environ[ASYNC_BODY] = feed.stream_async(last_event_id)
+        body = iter(())
+    else:
+        body = feed.stream(last_event_id)
+    response = Response(
+        body,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.call_on_close(feed.disconnect)
+    return response
 
 @app.route('/api/stats')
 @admin_required
 def get_stats():
     try:
-        stats = db.get_enhanced_stats()
-        return jsonify(stats)
+        return cached_json(('stats',), lambda store: store.get_enhanced_stats())
+    except UnknownEvent:
+        raise
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 400
 
 @app.route('/api/player/<initials>/stats')
 def get_player_stats(initials):
+    """A player's totals and attempts, newest first, Config.PLAYER_HISTORY_PAGE at a time.
+
+    Pass the response's next_before as ?before= for the next older page.
+    """
+    # Stored as submit_score writes them
+    initials = initials.upper()
+    limit = min(max(request.args.get('limit', Config.PLAYER_HISTORY_PAGE, type=int), 1), Config.PLAYER_HISTORY_MAX_PAGE)
+    before = request.args.get('before', type=int)
     try:
-        return jsonify(db.get_player_stats(initials))
+        return cached_json(('player', initials, limit, before),
+                           lambda store: store.get_player_stats(initials, limit=limit, before=before))
+    except UnknownEvent:
+        raise
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 400
 
+@app.route('/api/player/<initials>/history')
+def get_player_history(initials):
+    """Best attempt per archived event for a player, across every event."""
+    return jsonify(events.index.player_history(initials.upper()))
+
+@app.route('/api/events', methods=['GET'])
+def list_events():
+    return jsonify({'events': events.list_events()})
+
+@app.route('/api/events', methods=['POST'])
+@admin_required
+def create_event():
+    try:
+        event = events.create(
+            request.form.get('slug', '').strip().lower(),
+            request.form.get('name', '').strip(),
+            machine=request.form.get('machine') or None,
+            venue=request.form.get('venue') or None
+        )
+        return jsonify({'status': 'success', 'event': event}), 201
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics of the worker process that answers."""
+    if not Config.METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=False)
\ No newline at end of file
@@ -0,0 +1,307 @@
+# asgi.py
+"""Async serving mode, for one process holding many slow uploads and live viewers.
+
+    pip install -r requirements.txt  # uvicorn, and httpx for the async OCR client
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+
+The routes are still the Flask app's; this is a thin ASGI front that calls
+it, so every response is the one gunicorn would send. What changes is what
+waits on what:
+
+- Live leaderboard streams and job polls are answered on the event loop
+  from the in-process state; neither takes the score store's lock.
+- A photo upload takes one of UPLOAD_MAX_IN_FLIGHT intake slots before any
+  of its body is received, and is answered 429 right away when none is
+  free. The view then reads the body from the client as it parses it, in a
+  thread of its own, so a file that fails the intake checks is refused
+  without receiving the rest.
+- OCR jobs are tasks on the loop (OCR_ASYNC_JOBS at once) and await
+  OCR.space on one pooled httpx client; without httpx they run in threads.
+- /api/leaderboard/stream viewers wait on the change feed without a thread
+  each; raise SSE_MAX_CLIENTS to let hundreds connect.
+- Everything else runs in a pool of ASGI_THREADS threads. That includes
+  /api/leaderboard: its version check and render take the store's lock,
+  which a write holds while it saves, so it would stall the loop. Batch
+  uploads are read from the client by their thread as the view parses
+  them, instead of being held in memory up to OCR_BATCH_MAX_UPLOAD_BYTES.
+"""
+import asyncio
+import io
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from werkzeug.exceptions import ClientDisconnected
+
+from app import (ASYNC_BODY, UPLOAD_SLOT, app as flask_app, ocr_engine, ocr_api, ocr_job_result, ocr_jobs,
+                 upload_slots)
+from config import Config
+from ocr import extract_text_async
+
+# (methods, path) of the routes called on the event loop
+INLINE_ROUTES = (
+    (('GET', 'HEAD'), re.compile(r'^/api/leaderboard/stream$')),
+    (('GET', 'HEAD'), re.compile(r'^/api/process_image/[^/]+$')),
+)
+# Photo uploads, whose body is streamed to the view instead of read up front
+UPLOAD_ROUTE = re.compile(r'^/api/process_image$')
+# Batch uploads, streamed to a pool thread: their limit, BODY_LIMITS in
+# app.py, is too large to hold in memory before the view runs
+BATCH_ROUTE = re.compile(r'^/api/batch/process_images$')
+
+
+async def run_ocr_job_async(job):
+    return ocr_job_result(job, await extract_text_async(ocr_engine, job.image, job.timings))
+
+
+def is_inline(method: str, path: str) -> bool:
+    return any(method in methods and pattern.match(path) for methods, pattern in INLINE_ROUTES)
+
+
+async def read_body(receive, limit: Optional[int]) -> Optional[bytes]:
+    """The request body, or None if the client left. Reading stops past limit;
+    the short body's length still exceeds it, so Flask answers 413 as usual."""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        chunks.append(chunk)
+        size += len(chunk)
+        if not message.get('more_body') or (limit is not None and size > limit):
+            return b''.join(chunks)
+
+
+class ReceiveStream(io.RawIOBase):
+    """wsgi.input that pulls the body from the client as it is read, for a
+    view running in a thread; what the view never reads is never received."""
+
+    def __init__(self, receive, loop: asyncio.AbstractEventLoop):
+        self._receive = receive
+        self._loop = loop
+        self._pending = b''
+        self._more = True
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and self._more:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                raise ClientDisconnected()
+            self._pending = message.get('body', b'')
+            self._more = message.get('more_body', False)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def app_path(scope: Dict) -> str:
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    return path
+
+
+def wsgi_environ(scope: Dict, body: bytes) -> Dict:
+    root_path = scope.get('root_path', '')
+    path = app_path(scope)
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').lower()
+        value = value.decode('latin-1')
+        if name == 'content-length':
+            continue
+        key = 'CONTENT_TYPE' if name == 'content-type' else 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    if body or scope['method'] in ('POST', 'PUT', 'PATCH'):
+        environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+def streamed_environ(scope: Dict, stream) -> Dict:
+    """wsgi_environ for a body read from stream, which ends with the request;
+    Werkzeug still answers 413 up front for a Content-Length over the limit."""
+    environ = wsgi_environ(scope, b'')
+    environ.pop('CONTENT_LENGTH', None)
+    for name, value in scope.get('headers', []):
+        if name.lower() == b'content-length':
+            environ['CONTENT_LENGTH'] = value.decode('latin-1')
+    environ['wsgi.input'] = stream
+    environ['wsgi.input_terminated'] = True
+    return environ
+
+
+def response_start(status: str, headers: List) -> Dict:
+    return {
+        'type': 'http.response.start',
+        'status': int(status.split(' ', 1)[0]),
+        'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    }
+
+
+class PinPuttASGI:
+    def __init__(self, wsgi_app: Callable, threads: int):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi-wsgi')
+        # One thread per intake slot, so an upload that has a slot never waits
+        self.uploads = ThreadPoolExecutor(max_workers=Config.UPLOAD_MAX_IN_FLIGHT, thread_name_prefix='asgi-upload')
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            ocr_jobs.run_on_loop(loop, run_ocr_job_async, Config.OCR_ASYNC_JOBS)
+
+    async def __call__(self, scope: Dict, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope {scope['type']}")
+        self._bind()
+        if scope['method'] == 'POST' and UPLOAD_ROUTE.match(app_path(scope)):
+            await self._upload(scope, receive, send)
+            return
+        if scope['method'] == 'POST' and BATCH_ROUTE.match(app_path(scope)):
+            environ = streamed_environ(scope, ReceiveStream(receive, self._loop))
+            await self._loop.run_in_executor(self.executor, self._threaded, environ, send, self._loop)
+            return
+        body = await read_body(receive, flask_app.config.get('MAX_CONTENT_LENGTH'))
+        if body is None:
+            return
+        environ = wsgi_environ(scope, body)
+        if is_inline(scope['method'], environ['PATH_INFO']):
+            environ[ASYNC_BODY] = None
+            await self._inline(environ, receive, send)
+        else:
+            await self._loop.run_in_executor(self.executor, self._threaded, environ, send, self._loop)
+
+    async def _upload(self, scope: Dict, receive, send) -> None:
+        if not upload_slots.acquire(blocking=False):
+            # The view answers 429 for a request without a slot; none of the body is read
+            environ = wsgi_environ(scope, b'')
+            environ[UPLOAD_SLOT] = False
+            environ[ASYNC_BODY] = None
+            await self._inline(environ, receive, send)
+            return
+        try:
+            environ = streamed_environ(scope, ReceiveStream(receive, self._loop))
+            environ[UPLOAD_SLOT] = True
+            await self._loop.run_in_executor(self.uploads, self._threaded, environ, send, self._loop)
+        finally:
+            upload_slots.release()
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._bind()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await ocr_api.aclose()
+                self.executor.shutdown(wait=False)
+                self.uploads.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _inline(self, environ: Dict, receive, send) -> None:
+        started = {}
+        written = []
+
+        def start_response(status, headers, exc_info=None):
+            started['status'], started['headers'] = status, headers
+            return written.append
+
+        app_iter = self.wsgi_app(environ, start_response)
+        try:
+            body = b''.join(written) + b''.join(app_iter)
+            await send(response_start(started['status'], started['headers']))
+            stream = environ[ASYNC_BODY]
+            if stream is None:
+                await send({'type': 'http.response.body', 'body': body})
+            else:
+                await self._send_stream(stream, receive, send)
+        finally:
+            # Runs the view's call_on_close, e.g. freeing a stream's client slot
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    @staticmethod
+    async def _send_stream(stream, receive, send) -> None:
+        async def pump():
+            async for message in stream:
+                await send({'type': 'http.response.body', 'body': message.encode('utf-8'), 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        async def disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        pumping = asyncio.ensure_future(pump())
+        watching = asyncio.ensure_future(disconnect())
+        try:
+            await asyncio.wait((pumping, watching), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (pumping, watching):
+                task.cancel()
+            await asyncio.gather(pumping, watching, return_exceptions=True)
+            await stream.aclose()
+
+    def _threaded(self, environ: Dict, send, loop: asyncio.AbstractEventLoop) -> None:
+        def send_now(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        started = {}
+        sent_start = False
+
+        def start_response(status, headers, exc_info=None):
+            started['status'], started['headers'] = status, headers
+            return write
+
+        def write(data):
+            nonlocal sent_start
+            if not sent_start:
+                send_now(response_start(started['status'], started['headers']))
+                sent_start = True
+            if data:
+                send_now({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+        app_iter = self.wsgi_app(environ, start_response)
+        try:
+            # Streamed bodies, e.g. batch NDJSON, go out chunk by chunk
+            for chunk in app_iter:
+                if chunk:
+                    write(chunk)
+            write(b'')
+            send_now({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+
+app = PinPuttASGI(flask_app, Config.ASGI_THREADS)
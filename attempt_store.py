@@ -0,0 +1,169 @@
+# attempt_store.py
+import base64
+import sys
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# scores.json layouts: 1 is a list of attempt dicts per player; 2 stores each
+# player as COLUMNS of int64, base64-encoded so they load with one copy
+SNAPSHOT_FORMAT = 2
+COLUMNS = ('score', 'distance', 'timestamp', 'target')
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def timestamp_to_micros(timestamp: str) -> int:
+    """Microseconds since 1970-01-01 of a naive ISO timestamp, as add_attempts writes them."""
+    return (datetime.fromisoformat(timestamp) - EPOCH) // MICROSECOND
+
+
+def micros_to_timestamp(micros: int) -> str:
+    return (EPOCH + micros * MICROSECOND).isoformat()
+
+
+def check_int64(name: str, value: int) -> None:
+    """Raise ValueError unless value fits an int64 column."""
+    if not INT64_MIN <= value <= INT64_MAX:
+        raise ValueError(f'{name.capitalize()} {value} is out of range')
+
+
+def encode_column(column: array) -> str:
+    """Base64 of the column as little-endian int64, loadable without a Python int per value."""
+    if sys.byteorder == 'big':
+        column = array('q', column)
+        column.byteswap()
+    return base64.b64encode(column.tobytes()).decode('ascii')
+
+
+def decode_column(encoded: str) -> array:
+    column = array('q', base64.b64decode(encoded))
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+class PlayerAttempts:
+    """One player's attempts as parallel int64 columns.
+
+    An attempt costs 32 bytes here against several hundred as a dict with
+    its own timestamp string. The dict shape the API returns is rebuilt on
+    demand by attempt() and attempts(). The best distance, best score and
+    score total are kept as attempts are appended, so a player's summary
+    never rescans the columns.
+    """
+
+    __slots__ = ('scores', 'distances', 'timestamps', 'targets', 'best_distance', 'best_score', 'total_score')
+
+    def __init__(self):
+        self.scores = array('q')
+        self.distances = array('q')
+        self.timestamps = array('q')
+        self.targets = array('q')
+        self.best_distance: Optional[int] = None
+        self.best_score: Optional[int] = None
+        self.total_score = 0
+
+    @classmethod
+    def from_json(cls, player: Dict) -> 'PlayerAttempts':
+        """Load a player from either scores.json layout."""
+        self = cls()
+        if 'attempts' in player:
+            for attempt in player['attempts']:
+                self.append(attempt)
+            return self
+        self.scores, self.distances, self.timestamps, self.targets = (
+            decode_column(player[column]) for column in COLUMNS)
+        self.best_distance = min(self.distances) if self.distances else None
+        self.best_score = max(self.scores) if self.scores else None
+        self.total_score = sum(self.scores)
+        return self
+
+    def to_json(self) -> Dict:
+        columns = (self.scores, self.distances, self.timestamps, self.targets)
+        return {name: encode_column(column) for name, column in zip(COLUMNS, columns)}
+
+    def append(self, attempt: Dict) -> None:
+        self.scores.append(attempt['score'])
+        self.distances.append(attempt['distance'])
+        self.timestamps.append(timestamp_to_micros(attempt['timestamp']))
+        self.targets.append(attempt['target'])
+        if self.best_distance is None or attempt['distance'] < self.best_distance:
+            self.best_distance = attempt['distance']
+        if self.best_score is None or attempt['score'] > self.best_score:
+            self.best_score = attempt['score']
+        self.total_score += attempt['score']
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def attempt(self, index: int) -> Dict:
+        return {
+            'score': self.scores[index],
+            'timestamp': micros_to_timestamp(self.timestamps[index]),
+            'distance': self.distances[index],
+            'target': self.targets[index]
+        }
+
+    def attempts(self) -> List[Dict]:
+        return [self.attempt(index) for index in range(len(self))]
+
+    def page(self, limit: Optional[int] = None, before: Optional[int] = None) -> Tuple[List[Dict], Optional[int]]:
+        """Up to limit attempts older than index before, newest first, and the before of the next page.
+
+        Attempts are only ever appended, so an index stays a valid cursor
+        until the event is reset.
+        """
+        end = len(self) if before is None else max(0, min(before, len(self)))
+        start = 0 if limit is None else max(0, end - limit)
+        return [self.attempt(index) for index in range(end - 1, start - 1, -1)], start or None
+
+    def best_index(self) -> Optional[int]:
+        """Index of the first attempt with the smallest distance."""
+        if self.best_distance is None:
+            return None
+        return self.distances.index(self.best_distance)
+
+
+def iter_attempts(players: Dict[str, PlayerAttempts]) -> Iterator[tuple]:
+    """(initials, attempt dict) for every attempt, player by player."""
+    for initials, player in players.items():
+        for index in range(len(player)):
+            yield initials, player.attempt(index)
+
+
+def summarize_players(players: Dict[str, PlayerAttempts]) -> Dict[str, Dict]:
+    """Best attempt (earliest on ties) and attempt count of each player who has one."""
+    summary = {}
+    for initials, player in players.items():
+        best = player.best_index()
+        if best is None:
+            continue
+        attempt = player.attempt(best)
+        summary[initials] = {
+            'score': attempt['score'],
+            'distance': attempt['distance'],
+            'timestamp': attempt['timestamp'],
+            'target': attempt['target'],
+            'total_attempts': len(player)
+        }
+    return summary
+
+
+def snapshot_from_json(raw: Dict) -> Dict:
+    """In-memory data from a parsed scores.json of either layout."""
+    data = dict(raw)
+    data['players'] = {initials: PlayerAttempts.from_json(player)
+                       for initials, player in raw['players'].items()}
+    return data
+
+
+def snapshot_to_json(data: Dict) -> Dict:
+    raw = dict(data)
+    raw['format'] = SNAPSHOT_FORMAT
+    raw['players'] = {initials: player.to_json() for initials, player in data['players'].items()}
+    return raw
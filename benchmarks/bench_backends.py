@@ -0,0 +1,138 @@
+"""Compare the scores.json and SQLite backends at several event sizes.
+
+Usage:
+    python benchmarks/bench_backends.py [--sizes 1000,100000,1000000] [--players 2000] [--json results.json]
+
+Each size gets a scratch directory with a synthetic season loaded straight
+into both backends, then every PinPuttDB method is timed against it. Times
+are the best of several runs, in milliseconds; --json also writes them as a
+list of rows, one per size and backend.
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from database import PinPuttDB  # noqa: E402
+from sqlite_db import REBUILD_BESTS_SQL, REBUILD_SEASON_TOTALS_SQL, REBUILD_TOTALS_SQL, SQLitePinPuttDB  # noqa: E402
+
+TARGET = 2500000
+
+
+def synthetic_players(attempts: int, players: int, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    initials = [''.join(rng.choices(string.ascii_uppercase, k=3)) for _ in range(players)]
+    start = datetime(2025, 2, 7, 12, 0, 0)
+    data = {}
+    for i in range(attempts):
+        score = rng.randint(100000, 60000000)
+        player = data.setdefault(rng.choice(initials), {'attempts': [], 'best_distance': None})
+        distance = abs(score - TARGET)
+        player['attempts'].append({
+            'score': score,
+            'timestamp': (start + timedelta(seconds=i)).isoformat(),
+            'distance': distance,
+            'target': TARGET
+        })
+        if player['best_distance'] is None or distance < player['best_distance']:
+            player['best_distance'] = distance
+    return data
+
+
+def build_json(data_dir: str, players: dict) -> None:
+    with open(os.path.join(data_dir, 'scores.json'), 'w', encoding='utf-8') as f:
+        json.dump({'current_target': TARGET, 'events': [], 'players': players}, f, indent=2)
+
+
+def build_sqlite(db_file: str, players: dict) -> None:
+    db = SQLitePinPuttDB(db_file)
+    db.set_target(TARGET)
+    conn = db._conn()
+    conn.execute('BEGIN')
+    conn.executemany('INSERT INTO players (initials) VALUES (?)', [(i,) for i in players])
+    ids = {row['initials']: row['id'] for row in conn.execute('SELECT id, initials FROM players')}
+    conn.executemany(
+        'INSERT INTO attempts (season_id, player_id, target_id, score, distance, timestamp) VALUES (1, ?, 1, ?, ?, ?)',
+        ((ids[i], a['score'], a['distance'], a['timestamp']) for i, p in players.items() for a in p['attempts'])
+    )
+    conn.execute(REBUILD_BESTS_SQL, (1,))
+    conn.execute(REBUILD_TOTALS_SQL, (1,))
+    conn.execute(REBUILD_SEASON_TOTALS_SQL, (1,))
+    conn.execute('COMMIT')
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench(name: str, make_db, sample_player: str) -> dict:
+    start = time.perf_counter()
+    db = make_db()
+    db.get_current_target()
+    results = {'backend': name, 'open_ms': (time.perf_counter() - start) * 1000}
+    results['get_current_target_ms'] = timed(db.get_current_target)
+    results['get_leaderboard_ms'] = timed(db.get_leaderboard)
+    results['get_leaderboard_top20_ms'] = timed(lambda: db.get_leaderboard(limit=20))
+    results['get_leaderboard_count_ms'] = timed(db.get_leaderboard_count)
+    results['get_player_stats_ms'] = timed(lambda: db.get_player_stats(sample_player))
+    results['get_player_stats_page_ms'] = timed(lambda: db.get_player_stats(sample_player, limit=50))
+    results['get_enhanced_stats_ms'] = timed(db.get_enhanced_stats, repeat=3)
+    results['add_attempt_ms'] = timed(lambda: db.add_attempt('ZZZ', TARGET + 1), repeat=3)
+    batch = [(f'Z{i % 26:02d}', TARGET + i) for i in range(100)]
+    results['add_attempts_100_ms'] = timed(lambda: db.add_attempts(batch), repeat=3)
+    # Closes the season, so it goes last
+    start = time.perf_counter()
+    archive = db.reset_scores()
+    results['reset_scores_ms'] = (time.perf_counter() - start) * 1000
+    results['archive_summary_ms'] = timed(lambda: db.archive_summary(archive), repeat=3)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,100000,1000000')
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--json', metavar='PATH', help='also write the results here as JSON')
+    args = parser.parse_args()
+
+    columns = ['open_ms', 'get_current_target_ms', 'get_leaderboard_ms', 'get_leaderboard_top20_ms',
+               'get_leaderboard_count_ms', 'get_player_stats_ms', 'get_player_stats_page_ms', 'get_enhanced_stats_ms',
+               'add_attempt_ms', 'add_attempts_100_ms', 'reset_scores_ms', 'archive_summary_ms']
+    rows = []
+    print(f"{'attempts':>9} {'backend':>8} " + ' '.join(f'{c[:-3]:>22}' for c in columns))
+    for size in (int(s) for s in args.sizes.split(',')):
+        players = synthetic_players(size, args.players)
+        sample_player = max(players, key=lambda i: len(players[i]['attempts']))
+        with tempfile.TemporaryDirectory(prefix='pinputt_bench_') as tmp:
+            json_dir = os.path.join(tmp, 'json')
+            os.makedirs(json_dir)
+            build_json(json_dir, players)
+            build_sqlite(os.path.join(tmp, 'scores.db'), players)
+            for name, make_db in (
+                ('json', lambda: PinPuttDB(json_dir)),
+                ('sqlite', lambda: SQLitePinPuttDB(os.path.join(tmp, 'scores.db')))
+            ):
+                row = bench(name, make_db, sample_player)
+                print(f'{size:>9} {name:>8} ' + ' '.join(f'{row[c]:>22.2f}' for c in columns))
+                rows.append({'attempts': size, 'players': args.players, **row})
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""Compare the legacy temp-file OCR preprocessing with the in-memory pipeline.
+
+Usage:
+    python benchmarks/bench_image_pipeline.py [CORPUS_DIR] [--synthetic 8] [--max-size-mb 0.25]
+
+CORPUS_DIR should hold real phone photos (*.jpg, *.jpeg, *.png); without it
+a set of noisy 12MP synthetic photos is generated. Each pipeline runs in its
+own child process so its peak RSS is not polluted by the other's; the table
+shows per-stage latency (mean and max, ms), JPEG encodes per image and the
+peak RSS growth over the idle child.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from ocr import OCRConfig, OCRSpaceAPI  # noqa: E402
+
+EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def synthetic_corpus(directory: str, count: int, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    for i in range(count):
+        # Photo-like: sensor noise over a scene, so JPEG cannot squash it
+        img = Image.effect_noise((4032, 3024), 40).convert('RGB')
+        draw = ImageDraw.Draw(img)
+        for _ in range(40):
+            x, y = rng.randrange(4032), rng.randrange(3024)
+            draw.rectangle([x, y, x + rng.randrange(50, 800), y + rng.randrange(50, 500)],
+                           fill=tuple(rng.randrange(256) for _ in range(3)))
+        img.save(os.path.join(directory, f'synthetic_{i}.jpg'), quality=92)
+
+
+def legacy_pipeline(image_bytes: bytes, scratch: str, max_size_mb: float, timings: dict) -> int:
+    """The pre-in-memory path: save upload, full decode, LANCZOS, linear quality walk, temp file."""
+    started = time.perf_counter()
+    image_path = os.path.join(scratch, 'upload.jpg')
+    with open(image_path, 'wb') as f:
+        f.write(image_bytes)
+    timings['save'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    encodes = 0
+    with Image.open(image_path) as img:
+        img = img.resize((img.width // 2, img.height // 2), Image.Resampling.LANCZOS)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        timings['decode'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        buffer = io.BytesIO()
+        quality = 95
+        while True:
+            buffer.seek(0)
+            buffer.truncate(0)
+            img.save(buffer, format='JPEG', quality=quality)
+            encodes += 1
+            if buffer.tell() / (1024 * 1024) <= max_size_mb:
+                break
+            quality -= 5
+            if quality < 10:
+                raise ValueError('Cannot compress image')
+        compressed_path = f'{os.path.splitext(image_path)[0]}_compressed.jpg'
+        img.save(compressed_path, format='JPEG', quality=quality)
+        encodes += 1
+        timings['encode'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with open(compressed_path, 'rb') as f:
+        f.read()
+    os.remove(compressed_path)
+    os.remove(image_path)
+    timings['readback'] = time.perf_counter() - started
+    return encodes
+
+
+def inmemory_pipeline(image_bytes: bytes, scratch: str, max_size_mb: float, timings: dict) -> int:
+    encodes = 0
+    original = OCRSpaceAPI._encode_jpeg
+
+    def counting_encode(img, quality):
+        nonlocal encodes
+        encodes += 1
+        return original(img, quality)
+
+    OCRSpaceAPI._encode_jpeg = staticmethod(counting_encode)
+    try:
+        started = time.perf_counter()
+        img = OCRSpaceAPI._decode_half_size(image_bytes)
+        timings['decode'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        OCRSpaceAPI._encode_under(img, max_size_mb * 1024 * 1024)
+        timings['encode'] = time.perf_counter() - started
+    finally:
+        OCRSpaceAPI._encode_jpeg = staticmethod(original)
+    return encodes
+
+
+PIPELINES = {'legacy': legacy_pipeline, 'inmemory': inmemory_pipeline}
+
+
+def peak_rss_kb() -> int:
+    # ru_maxrss survives exec on Linux, so a child started by a big parent
+    # would report the parent's peak; VmHWM belongs to this process alone
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_child(pipeline: str, paths: list, max_size_mb: float) -> dict:
+    """Run one pipeline over the corpus in this process and return its measurements."""
+    # Loaded before the baseline so the upload bytes do not count as pipeline memory
+    uploads = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            uploads.append(f.read())
+    OCRSpaceAPI(OCRConfig('', '', debug=False))
+    baseline = peak_rss_kb()
+    stages, encodes = {}, []
+    with tempfile.TemporaryDirectory(prefix='pinputt_bench_') as scratch:
+        for image_bytes in uploads:
+            timings = {}
+            started = time.perf_counter()
+            encodes.append(PIPELINES[pipeline](image_bytes, scratch, max_size_mb, timings))
+            timings['total'] = time.perf_counter() - started
+            for stage, seconds in timings.items():
+                stages.setdefault(stage, []).append(seconds * 1000)
+    peak = peak_rss_kb()
+    return {
+        'pipeline': pipeline,
+        'images': len(paths),
+        'stages_ms': {stage: {'mean': sum(v) / len(v), 'max': max(v)} for stage, v in stages.items()},
+        'encodes_per_image': sum(encodes) / len(encodes),
+        'peak_rss_growth_mb': (peak - baseline) / 1024
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('corpus', nargs='?')
+    parser.add_argument('--synthetic', type=int, default=8)
+    parser.add_argument('--max-size-mb', type=float, default=0.25)
+    parser.add_argument('--child', choices=sorted(PIPELINES), help=argparse.SUPPRESS)
+    parser.add_argument('--paths', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, json.loads(args.paths), args.max_size_mb)))
+        return
+
+    with tempfile.TemporaryDirectory(prefix='pinputt_corpus_') as generated:
+        corpus = args.corpus
+        if not corpus:
+            print(f'Generating {args.synthetic} synthetic 12MP photos...')
+            synthetic_corpus(generated, args.synthetic)
+            corpus = generated
+        paths = sorted(os.path.join(corpus, name) for name in os.listdir(corpus)
+                       if name.lower().endswith(EXTENSIONS))
+        if not paths:
+            sys.exit(f'No images found in {corpus}')
+
+        for pipeline in ('legacy', 'inmemory'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', pipeline, '--paths', json.dumps(paths),
+                 '--max-size-mb', str(args.max_size_mb)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            row = json.loads(output)
+            print(f"\n{pipeline}: {row['images']} images, {row['encodes_per_image']:.1f} encodes/image, "
+                  f"peak RSS +{row['peak_rss_growth_mb']:.1f}MB")
+            for stage, ms in row['stages_ms'].items():
+                print(f"  {stage:>9} mean {ms['mean']:>8.1f}ms  max {ms['max']:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
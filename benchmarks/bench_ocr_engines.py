@@ -0,0 +1,136 @@
+"""Accuracy and latency of the offline digit reader against OCR.space.
+
+Usage:
+    python benchmarks/bench_ocr_engines.py [FIXTURES_DIR] [--synthetic 40] [--threshold 0.8] [--remote]
+
+FIXTURES_DIR holds score photos named after their true score, e.g.
+12345670.jpg or 12345670_kiosk2.jpg. Without it, synthetic dot-matrix
+display photos are generated. --remote also runs every fixture through
+OCR.space (needs OCR_PRO_KEY/OCR_FREE_KEY and network), so both paths are
+compared on the same corpus. "Accepted" results are those at or above the
+confidence threshold, i.e. the ones that would skip OCR.space in the app.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont  # noqa: E402
+
+from local_ocr import FONT_PATH, DigitTemplateOCR  # noqa: E402
+from ocr import OCRConfig, OCRSpaceAPI  # noqa: E402
+
+EXTENSIONS = ('.jpg', '.jpeg', '.png')
+DMD_SIZE = (128, 32)
+
+
+def dmd_photo(score: int, rng: random.Random) -> bytes:
+    """A phone photo of a 128x32 dot-matrix display showing score."""
+    frame = Image.new('L', DMD_SIZE, 0)
+    draw = ImageDraw.Draw(frame)
+    draw.text((64, 1), 'PLAYER 1', fill=255, anchor='mt', font=ImageFont.truetype(FONT_PATH, 7))
+    draw.text((64, 30), f'{score:,}', fill=255, anchor='mb', font=ImageFont.truetype(FONT_PATH, 19))
+
+    dot = rng.choice((5, 6, 7))
+    display = Image.new('RGB', (DMD_SIZE[0] * dot, DMD_SIZE[1] * dot), (20, 8, 0))
+    draw = ImageDraw.Draw(display)
+    for y in range(DMD_SIZE[1]):
+        for x in range(DMD_SIZE[0]):
+            level = frame.getpixel((x, y))
+            if level > 64:
+                colour = (255 * level // 255, 120 * level // 255, 0)
+                draw.ellipse([x * dot, y * dot, x * dot + dot - 2, y * dot + dot - 2], fill=colour)
+
+    photo = Image.new('RGB', (display.width + 400, display.height + 500), (35, 35, 40))
+    photo.paste(display, (200 + rng.randint(-60, 60), 250 + rng.randint(-80, 80)))
+    photo = photo.rotate(rng.uniform(-2, 2), resample=Image.Resampling.BICUBIC, fillcolor=(35, 35, 40))
+    photo = photo.filter(ImageFilter.GaussianBlur(rng.uniform(0.5, 1.5)))
+    noise = Image.effect_noise(photo.size, 12).convert('RGB')
+    photo = Image.blend(photo, noise, 0.08)
+    buffer = io.BytesIO()
+    photo.save(buffer, format='JPEG', quality=rng.randint(70, 92))
+    return buffer.getvalue()
+
+
+def synthetic_fixtures(count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    fixtures = []
+    for _ in range(count):
+        score = rng.randint(10000, 99999999)
+        fixtures.append((score, dmd_photo(score, rng)))
+    return fixtures
+
+
+def load_fixtures(directory: str) -> list:
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        stem = os.path.splitext(name)[0].split('_')[0].replace(',', '')
+        if name.lower().endswith(EXTENSIONS) and stem.isdigit():
+            with open(os.path.join(directory, name), 'rb') as f:
+                fixtures.append((int(stem), f.read()))
+    return fixtures
+
+
+def evaluate(engine, fixtures: list, threshold: float) -> dict:
+    latencies, correct, accepted, accepted_correct = [], 0, 0, 0
+    for score, image_bytes in fixtures:
+        started = time.perf_counter()
+        result = engine.extract_text(image_bytes)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hit = result is not None and result.score == score
+        correct += hit
+        if result is not None and result.score is not None and result.confidence >= threshold:
+            accepted += 1
+            accepted_correct += hit
+    latencies.sort()
+    return {
+        'accuracy': correct / len(fixtures),
+        'accepted': accepted / len(fixtures),
+        'accepted_precision': accepted_correct / accepted if accepted else None,
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('fixtures', nargs='?')
+    parser.add_argument('--synthetic', type=int, default=40)
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--remote', action='store_true')
+    parser.add_argument('--save', help='Write the synthetic fixtures to this directory')
+    args = parser.parse_args()
+
+    if args.fixtures:
+        fixtures = load_fixtures(args.fixtures)
+    else:
+        fixtures = synthetic_fixtures(args.synthetic)
+        if args.save:
+            os.makedirs(args.save, exist_ok=True)
+            for i, (score, image_bytes) in enumerate(fixtures):
+                with open(os.path.join(args.save, f'{score}_{i}.jpg'), 'wb') as f:
+                    f.write(image_bytes)
+    if not fixtures:
+        sys.exit('No fixtures found')
+
+    engines = [('local', DigitTemplateOCR())]
+    if args.remote:
+        engines.append(('ocr.space', OCRSpaceAPI(OCRConfig(
+            pro_key=os.getenv('OCR_PRO_KEY'), free_key=os.getenv('OCR_FREE_KEY'), debug=False))))
+
+    print(f'{len(fixtures)} fixtures, confidence threshold {args.threshold}')
+    print(f"{'engine':>10} {'accuracy':>9} {'accepted':>9} {'precision':>10} {'p50_ms':>9} {'p95_ms':>9}")
+    for name, engine in engines:
+        row = evaluate(engine, fixtures, args.threshold)
+        precision = f"{row['accepted_precision']:.3f}" if row['accepted_precision'] is not None else '-'
+        print(f"{name:>10} {row['accuracy']:>9.3f} {row['accepted']:>9.3f} {precision:>10} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
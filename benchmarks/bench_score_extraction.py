@@ -0,0 +1,183 @@
+"""Regression and speed check of score extraction over saved OCR.space responses.
+
+Usage:
+    python benchmarks/bench_score_extraction.py [RESPONSES_DIR] [--synthetic 2000] [--show-misses]
+
+RESPONSES_DIR holds raw OCR.space JSON responses, as saved by the app when
+OCR_RESPONSE_DIR is set, renamed to start with the true score
+(12345670_20250207-120000-ab12cd34.json) or carrying an "expected_score"
+key. Without it, responses covering the display layouts seen so far are
+generated; ScoreExtractor was written against those layouts, so accuracy
+on them is a regression check only. Accuracy claims need saved real
+responses. The three original line strategies are compared with
+ScoreExtractor on top-1 accuracy, top-3 recall and time per response.
+The ranker also walks the overlay geometry, so it costs several times as
+much as the old cascade; both are microseconds next to an OCR round trip.
+
+CASES are OCR texts the old cascade read correctly; every run checks that
+the ranker still puts their score first.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from score_extraction import ScoreExtractor  # noqa: E402
+
+
+# (OCR text, true score)
+CASES = [
+    ('PLAYER 1 12,345,670', 12345670),
+    ('12,345,670 PLAYER 1\nBALL 3', 12345670),
+    ('PLAYER 2\nBALL 3\n8,765,430', 8765430),
+    ('PLAYER 1\n12,345,670\nLEVEL 4', 12345670),
+    ('CREDITS 2\n45,000,000', 45000000),
+]
+
+
+def legacy_extract(text: str):
+    """The original between-markers / near-player / first-numeric cascade."""
+    lines = text.split('\n')
+    player_index = next((i for i, line in enumerate(lines) if 'PLAYER' in line.upper()), -1)
+    level_index = next((i for i, line in enumerate(lines) if 'LEVEL' in line.upper()), -1)
+    if player_index != -1 and level_index != -1 and player_index + 1 < level_index:
+        score = re.sub(r'[^\d]', '', lines[player_index + 1])
+        if score:
+            return int(score)
+    for i, line in enumerate(lines):
+        if 'PLAYER' in line.upper():
+            for j in range(1, 3):
+                if i + j < len(lines):
+                    score = re.sub(r'[^\d]', '', lines[i + j])
+                    if score:
+                        return int(score)
+    scores = re.findall(r'\d{5,}', text.replace('.', ''))
+    return int(scores[0]) if scores else None
+
+
+def _overlay(lines):
+    """TextOverlay for (text, height) lines, one word per space-separated chunk."""
+    overlay_lines, top = [], 10
+    for text, height in lines:
+        words, left = [], 10
+        for word in text.split():
+            words.append({'WordText': word, 'Left': left, 'Top': top, 'Height': height, 'Width': len(word) * height // 2})
+            left += len(word) * height // 2 + height // 3
+        overlay_lines.append({'LineText': text, 'Words': words, 'MaxHeight': height, 'MinTop': top})
+        top += height + 8
+    return {'Lines': overlay_lines, 'HasOverlay': True}
+
+
+def synthetic_response(rng: random.Random):
+    score = rng.randint(10000, 999999999)
+    formatted = f'{score:,}'
+    small = rng.choice(['CREDITS 2', 'BALL 3', 'FREE PLAY', 'MATCH 40', 'HIGH SCORE 1 45,000,000', 'EXTRA BALL'])
+    layout = rng.choice(['markers', 'player', 'plain', 'spaced', 'noise_first', 'period', 'player_inline',
+                         'score_then_player'])
+    if layout == 'markers':
+        lines = [(f'PLAYER {rng.randint(1, 4)}', 20), (formatted, 60), (f'LEVEL {rng.randint(1, 9)}', 20)]
+    elif layout == 'player':
+        lines = [(f'PLAYER {rng.randint(1, 4)}', 20), (small, 18), (formatted, 60)]
+    elif layout == 'plain':
+        lines = [(formatted, 60), (small, 18)]
+    elif layout == 'spaced':
+        lines = [(f'PLAYER {rng.randint(1, 4)}', 20), (formatted.replace(',', ' '), 60), (small, 18)]
+    elif layout == 'noise_first':
+        lines = [(f'GAME ID {rng.randint(10000, 99999)}', 14), (formatted, 60), (small, 18)]
+    elif layout == 'period':
+        lines = [(formatted.replace(',', '.'), 60), (small, 18)]
+    elif layout == 'player_inline':
+        lines = [(f'PLAYER {rng.randint(1, 4)} {formatted}', 60), (small, 18)]
+    else:
+        lines = [(f'{formatted} PLAYER {rng.randint(1, 4)}', 60), (small, 18)]
+    text = '\r\n'.join(line for line, _ in lines)
+    return score, {
+        'OCRExitCode': 1,
+        'ParsedResults': [{'ParsedText': text, 'TextOverlay': _overlay(lines)}]
+    }
+
+
+def load_responses(directory: str):
+    responses = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+            response = json.load(f)
+        prefix = name.split('_')[0]
+        expected = response.get('expected_score', int(prefix) if prefix.isdigit() else None)
+        if expected is not None and response.get('ParsedResults'):
+            responses.append((int(expected), response))
+    return responses
+
+
+def timed(run, count: int, repeat: int = 5):
+    """run()'s result and its best microseconds per item over repeat runs."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best / count * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('responses', nargs='?')
+    parser.add_argument('--synthetic', type=int, default=2000)
+    parser.add_argument('--min-length', type=int, default=5)
+    parser.add_argument('--max-length', type=int, default=15)
+    parser.add_argument('--show-misses', action='store_true')
+    args = parser.parse_args()
+
+    if args.responses:
+        responses = load_responses(args.responses)
+    else:
+        rng = random.Random(1)
+        responses = [synthetic_response(rng) for _ in range(args.synthetic)]
+    if not responses:
+        sys.exit('No labelled responses found')
+
+    extractor = ScoreExtractor(args.min_length, args.max_length)
+    inputs = [(expected, r['ParsedResults'][0]['ParsedText'], r['ParsedResults'][0].get('TextOverlay'))
+              for expected, r in responses]
+
+    legacy, legacy_us = timed(lambda: [legacy_extract(text) for _, text, _ in inputs], len(inputs))
+    ranked, engine_us = timed(lambda: [extractor.extract(text, overlay) for _, text, overlay in inputs], len(inputs))
+
+    expected = [e for e, _, _ in inputs]
+    legacy_hits = sum(score == e for score, e in zip(legacy, expected))
+    top1 = sum(bool(c) and c[0].score == e for c, e in zip(ranked, expected))
+    top3 = sum(any(x.score == e for x in c[:3]) for c, e in zip(ranked, expected))
+
+    source = 'saved' if args.responses else 'synthetic (regression check only, not real-photo accuracy)'
+    print(f'{len(inputs)} {source} responses')
+    print(f"{'extractor':>10} {'top1':>7} {'top3':>7} {'us/resp':>9}")
+    print(f"{'legacy':>10} {legacy_hits / len(inputs):>7.3f} {'-':>7} {legacy_us:>9.1f}")
+    print(f"{'ranked':>10} {top1 / len(inputs):>7.3f} {top3 / len(inputs):>7.3f} {engine_us:>9.1f}")
+
+    failed = []
+    for text, score in CASES:
+        candidates = extractor.extract(text)
+        if not candidates or candidates[0].score != score:
+            failed.append((text, score))
+    print(f'{len(CASES) - len(failed)}/{len(CASES)} fixed cases')
+    for text, score in failed:
+        print(f'  expected {score}: {text!r}')
+
+    if args.show_misses:
+        for (e, text, _), candidates, old in zip(inputs, ranked, legacy):
+            if not candidates or candidates[0].score != e:
+                print(f'\nexpected {e}, legacy {old}, ranked {[(c.score, c.confidence) for c in candidates[:3]]}')
+                print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Load time, resident memory and file size of scores.json, row vs columnar layout.
+
+Usage:
+    python benchmarks/bench_storage.py [--sizes 100000,1000000] [--players 2000]
+
+Each size gets a synthetic season written in today's row layout (a dict per
+attempt, indent=2) and in the columnar layout PinPuttDB now saves. Every
+load runs in a fresh interpreter so resident and peak RSS belong to it alone:
+
+    rows            json.load of the row layout, as PinPuttDB used to keep it
+    rows->columnar  PinPuttDB opening a row-layout file (first load after upgrade)
+    columnar        PinPuttDB opening a columnar file
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from bench_backends import build_json, synthetic_players  # noqa: E402
+from database import PinPuttDB  # noqa: E402
+
+
+def rss_kb(field: str) -> int:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def load_rows(data_dir: str):
+    with open(os.path.join(data_dir, 'scores.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_db(data_dir: str):
+    db = PinPuttDB(data_dir)
+    db.get_leaderboard(10)
+    return db
+
+
+def run_child(mode: str, data_dir: str) -> dict:
+    gc.collect()
+    baseline = rss_kb('VmRSS')
+    started = time.perf_counter()
+    loaded = load_rows(data_dir) if mode == 'rows' else load_db(data_dir)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    resident = rss_kb('VmRSS')
+    del loaded
+    return {
+        'load_s': elapsed,
+        'resident_mb': (resident - baseline) / 1024,
+        'peak_mb': (rss_kb('VmHWM') - baseline) / 1024
+    }
+
+
+def measure(mode: str, data_dir: str) -> dict:
+    output = subprocess.run([sys.executable, __file__, '--child', mode, '--dir', data_dir],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100000,1000000')
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--child', choices=('rows', 'columnar'), help=argparse.SUPPRESS)
+    parser.add_argument('--dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.dir)))
+        return
+
+    print(f"{'attempts':>9} {'layout':>15} {'file_mb':>8} {'load_s':>7} {'resident_mb':>12} {'peak_mb':>8}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory(prefix='pinputt_storage_') as tmp:
+            rows_dir = os.path.join(tmp, 'rows')
+            columnar_dir = os.path.join(tmp, 'columnar')
+            os.makedirs(rows_dir)
+            os.makedirs(columnar_dir)
+            build_json(rows_dir, synthetic_players(size, args.players))
+            with open(os.path.join(rows_dir, 'scores.json'), 'rb') as src, \
+                    open(os.path.join(columnar_dir, 'scores.json'), 'wb') as dst:
+                dst.write(src.read())
+            db = PinPuttDB(columnar_dir)
+            db.save_data(db.load_data())
+            del db
+
+            for label, mode, data_dir in (('rows', 'rows', rows_dir),
+                                          ('rows->columnar', 'columnar', rows_dir),
+                                          ('columnar', 'columnar', columnar_dir)):
+                file_mb = os.path.getsize(os.path.join(data_dir, 'scores.json')) / 1024 / 1024
+                row = measure(mode, data_dir)
+                print(f"{size:>9} {label:>15} {file_mb:>8.1f} {row['load_s']:>7.2f} "
+                      f"{row['resident_mb']:>12.1f} {row['peak_mb']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
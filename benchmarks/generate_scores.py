@@ -0,0 +1,51 @@
+"""Write a synthetic season into a data directory, for benchmarks and load tests.
+
+Usage:
+    python benchmarks/generate_scores.py --out /tmp/pinputt_data [--attempts 100000] [--players 2000]
+        [--layout columnar|rows] [--backend json|sqlite] [--seed 1]
+
+The directory can be served with DATA_DIR=<out> (plus DB_BACKEND=sqlite for
+--backend sqlite). Attempts are spread over players at random, one second
+apart, against a single target, as bench_backends.py generates them.
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from bench_backends import build_json, build_sqlite, synthetic_players  # noqa: E402
+from database import PinPuttDB  # noqa: E402
+
+
+def generate(data_dir: str, attempts: int, players: int, layout: str = 'columnar',
+             backend: str = 'json', seed: int = 1) -> None:
+    os.makedirs(data_dir, exist_ok=True)
+    season = synthetic_players(attempts, players, seed)
+    if backend == 'sqlite':
+        build_sqlite(os.path.join(data_dir, 'scores.db'), season)
+        return
+    build_json(data_dir, season)
+    if layout == 'columnar':
+        # Saving through PinPuttDB rewrites the row layout build_json writes
+        db = PinPuttDB(data_dir)
+        db.save_data(db.load_data())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', required=True)
+    parser.add_argument('--attempts', type=int, default=100000)
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--layout', choices=('columnar', 'rows'), default='columnar')
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    generate(args.out, args.attempts, args.players, args.layout, args.backend, args.seed)
+    print(f'{args.attempts} attempts by up to {args.players} players in {args.out}')
+
+
+if __name__ == '__main__':
+    main()
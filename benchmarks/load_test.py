@@ -0,0 +1,327 @@
+"""Closed-loop load test of the Flask API under gunicorn, with a stub OCR.space.
+
+Usage:
+    python benchmarks/load_test.py [--duration 60] [--attempts 100000] [--workers 4]
+        [--kiosks 20] [--players 5] [--admins 1] [--uploaders 2] [--json results.json]
+
+Seeds a throwaway DATA_DIR with a synthetic season, starts the stub OCR
+server and gunicorn, then runs virtual users that each wait for their
+response before thinking and sending the next request:
+
+    kiosk   polls /api/leaderboard?limit=20 with If-None-Match, like the home page
+    player  posts a burst of 1-4 scores to /api/score, then walks away
+    admin   reloads /api/stats
+    upload  posts a photo to /api/process_image and polls its job to the end
+
+Reports throughput, p50/p90/p99 latency and errors per scenario, plus the
+peak and final RSS of gunicorn and its workers. --think-scale 0 drops the
+think times to find the saturation point; --url runs against a server
+that is already up (no seeding, no RSS). --server uvicorn serves asgi.py
+in one process instead, to compare the async mode against gunicorn.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional
+
+import requests
+from PIL import Image
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from database import nearest_rank  # noqa: E402
+from generate_scores import generate  # noqa: E402
+from stress_concurrent_writes import free_port, wait_for_server  # noqa: E402
+from stub_ocr_server import StubOCRServer  # noqa: E402
+
+ADMIN_KEY = 'load_admin_key'
+PERCENTILES = (50, 90, 99)
+
+
+class Recorder:
+    """Latencies and outcomes per scenario, from the end of the warmup on."""
+
+    def __init__(self, record_from: float):
+        self.record_from = record_from
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, scenario: str, started: float, status: Optional[int], ok: bool) -> None:
+        if started < self.record_from:
+            return
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.latencies[scenario].append(elapsed)
+            self.statuses[scenario][str(status) if status is not None else 'failed'] += 1
+            if not ok:
+                self.errors[scenario] += 1
+
+    def summary(self, duration: float) -> Dict[str, Dict]:
+        summary = {}
+        for scenario in sorted(self.latencies):
+            ordered = sorted(self.latencies[scenario])
+            summary[scenario] = {
+                'requests': len(ordered),
+                'errors': self.errors[scenario],
+                'throughput_rps': len(ordered) / duration,
+                **{f'p{pct}_ms': nearest_rank(ordered, pct) * 1000 for pct in PERCENTILES},
+                'max_ms': ordered[-1] * 1000,
+                'statuses': dict(self.statuses[scenario])
+            }
+        return summary
+
+
+def tree_rss_kb(pid: int) -> int:
+    """VmRSS of a process and all its descendants."""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                total += next((int(line.split()[1]) for line in f if line.startswith('VmRSS:')), 0)
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return total
+
+
+class RSSSampler(threading.Thread):
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(name='rss-sampler', daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = self.last_kb = 0
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            self.last_kb = tree_rss_kb(self.pid)
+            self.peak_kb = max(self.peak_kb, self.last_kb)
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+def score_photo() -> bytes:
+    """A fresh noise JPEG, so neither the OCR cache nor its perceptual match can answer it."""
+    image = Image.effect_noise((640, 480), 64).convert('RGB')
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=85)
+    return out.getvalue()
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, name: str, base_url: str, recorder: Recorder, deadline: float,
+                 think_scale: float, seed: int):
+        super().__init__(name=name, daemon=True)
+        self.base_url = base_url
+        self.recorder = recorder
+        self.deadline = deadline
+        self.think_scale = think_scale
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+
+    def request(self, scenario: str, method: str, path: str, ok: Callable[[requests.Response], bool] = None,
+                **kwargs) -> Optional[requests.Response]:
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=30, **kwargs)
+        except requests.RequestException:
+            self.recorder.record(scenario, started, None, False)
+            return None
+        self.recorder.record(scenario, started, response.status_code,
+                             ok(response) if ok else response.ok)
+        return response
+
+    def think(self, low: float, high: float) -> None:
+        time.sleep(self.rng.uniform(low, high) * self.think_scale)
+
+    def run(self) -> None:
+        while time.monotonic() < self.deadline:
+            self.step()
+
+    def step(self) -> None:
+        raise NotImplementedError
+
+
+class Kiosk(VirtualUser):
+    etag = None
+
+    def step(self) -> None:
+        headers = {'If-None-Match': self.etag} if self.etag else {}
+        response = self.request('kiosk', 'GET', '/api/leaderboard?limit=20', headers=headers,
+                                ok=lambda r: r.status_code in (200, 304))
+        if response is not None and response.headers.get('ETag'):
+            self.etag = response.headers['ETag']
+        self.think(1.5, 2.5)
+
+
+class Player(VirtualUser):
+    def step(self) -> None:
+        initials = ''.join(self.rng.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=3))
+        for _ in range(self.rng.randint(1, 4)):
+            self.request('player', 'POST', '/api/score',
+                         data={'initials': initials, 'score': self.rng.randint(100000, 60000000)},
+                         ok=lambda r: r.ok and r.json().get('status') == 'success')
+            self.think(0.05, 0.3)
+        self.think(2, 8)
+
+
+class Admin(VirtualUser):
+    def step(self) -> None:
+        self.request('admin', 'GET', f'/api/stats?key={ADMIN_KEY}')
+        self.think(3, 7)
+
+
+class Uploader(VirtualUser):
+    def step(self) -> None:
+        started = time.monotonic()
+        response = self.request('upload', 'POST', '/api/process_image',
+                                files={'image': ('score.jpg', score_photo(), 'image/jpeg')},
+                                ok=lambda r: r.status_code == 202)
+        if response is None or response.status_code != 202:
+            self.think(1, 3)
+            return
+        status_url = response.json()['status_url']
+        status = None
+        while time.monotonic() < self.deadline + 30:
+            polled = self.request('upload_poll', 'GET', status_url, ok=lambda r: r.status_code == 200)
+            if polled is None:
+                break
+            status = polled.json().get('status') if polled.ok else None
+            if status not in ('queued', 'running'):
+                break
+            time.sleep(0.25)
+        # Photo in to score out, as the player waits for it
+        self.recorder.record('upload_result', started, 200 if status == 'done' else None, status == 'done')
+        self.think(3, 8)
+
+
+SCENARIOS = (('kiosks', Kiosk), ('players', Player), ('admins', Admin), ('uploaders', Uploader))
+
+
+def start_server(args, data_dir: str, stub: StubOCRServer) -> subprocess.Popen:
+    port = free_port()
+    env = dict(os.environ, DATA_DIR=data_dir, ADMIN_KEY=ADMIN_KEY, DB_BACKEND=args.backend,
+               DB_JOURNAL='true' if args.journal else 'false',
+               OCR_PRO_KEY='stub', OCR_FREE_KEY='stub', OCR_ENDPOINT_URLS=stub.endpoint_urls(),
+               OCR_LOCAL='false', OCR_CACHE_DISK='false')
+    if args.server == 'uvicorn':
+        command = ['uvicorn', '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning', 'asgi:app']
+        env['SSE_MAX_CLIENTS'] = env.get('SSE_MAX_CLIENTS', '1000')
+    else:
+        command = ['gunicorn', '-w', str(args.workers), '--threads', str(args.threads),
+                   '-b', f'127.0.0.1:{port}', 'app:app']
+    server = subprocess.Popen([sys.executable, '-m'] + command,
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    server.base_url = f'http://127.0.0.1:{port}'
+    return server
+
+
+def run(args, base_url: str, server_pid: Optional[int]) -> Dict:
+    requests.post(f'{base_url}/api/target', params={'key': ADMIN_KEY}, data={'target': 2500000})
+    sampler = RSSSampler(server_pid) if server_pid else None
+    if sampler:
+        sampler.start()
+
+    now = time.monotonic()
+    recorder = Recorder(now + args.warmup)
+    deadline = now + args.warmup + args.duration
+    users = [cls(f'{count}-{i}', base_url, recorder, deadline, args.think_scale, seed=seed)
+             for seed, (count, cls, i) in enumerate(
+                 (count, cls, i) for count, cls in SCENARIOS for i in range(getattr(args, count)))]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+
+    results = {
+        'config': {name: getattr(args, name) for name in (
+            'duration', 'warmup', 'attempts', 'players_in_data', 'backend', 'journal', 'server', 'workers', 'threads',
+            'kiosks', 'players', 'admins', 'uploaders', 'think_scale', 'ocr_latency_ms')},
+        'scenarios': recorder.summary(args.duration)
+    }
+    if sampler:
+        sampler.stop()
+        results['server_rss_mb'] = {'peak': sampler.peak_kb / 1024, 'final': sampler.last_kb / 1024}
+    return results
+
+
+def print_report(results: Dict) -> None:
+    print(f"{'scenario':>14} {'requests':>9} {'errors':>7} {'req/s':>8} "
+          + ' '.join(f"{f'p{pct}_ms':>8}" for pct in PERCENTILES) + f" {'max_ms':>8}  statuses")
+    for scenario, row in results['scenarios'].items():
+        statuses = ' '.join(f'{status}:{count}' for status, count in sorted(row['statuses'].items()))
+        print(f"{scenario:>14} {row['requests']:>9} {row['errors']:>7} {row['throughput_rps']:>8.1f} "
+              + ' '.join(f"{row[f'p{pct}_ms']:>8.1f}" for pct in PERCENTILES) + f" {row['max_ms']:>8.1f}  {statuses}")
+    if 'server_rss_mb' in results:
+        rss = results['server_rss_mb']
+        print(f"server RSS: peak {rss['peak']:.1f} MB, final {rss['final']:.1f} MB")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=60, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='seconds run before measuring')
+    parser.add_argument('--attempts', type=int, default=100000, help='attempts in the seeded season')
+    parser.add_argument('--players-in-data', type=int, default=2000, help='players in the seeded season')
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--journal', action='store_true', help='run with DB_JOURNAL enabled')
+    parser.add_argument('--server', choices=('gunicorn', 'uvicorn'), default='gunicorn',
+                        help='uvicorn serves asgi.py in one process; --workers/--threads are ignored')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--kiosks', type=int, default=20)
+    parser.add_argument('--players', type=int, default=5)
+    parser.add_argument('--admins', type=int, default=1)
+    parser.add_argument('--uploaders', type=int, default=2)
+    parser.add_argument('--think-scale', type=float, default=1.0, help='multiplies every think time; 0 saturates')
+    parser.add_argument('--ocr-latency-ms', type=float, default=300, help='median stub OCR.space delay')
+    parser.add_argument('--ocr-error-rate', type=float, default=0.0)
+    parser.add_argument('--url', help='test this running server instead of starting one')
+    parser.add_argument('--json', metavar='PATH', help="write machine-readable results here ('-' for stdout)")
+    args = parser.parse_args()
+
+    if args.url:
+        results = run(args, args.url.rstrip('/'), None)
+    else:
+        data_dir = tempfile.mkdtemp(prefix='pinputt_load_')
+        generate(data_dir, args.attempts, args.players_in_data, backend=args.backend)
+        stub = StubOCRServer(('127.0.0.1', free_port()), args.ocr_latency_ms, args.ocr_error_rate).start()
+        server = start_server(args, data_dir, stub)
+        try:
+            wait_for_server(server.base_url, timeout=60)
+            results = run(args, server.base_url, server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+            stub.shutdown()
+        results['ocr_stub_requests'] = stub.requests
+
+    if args.json == '-':
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(results)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+    return 1 if any(row['errors'] for row in results['scenarios'].values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
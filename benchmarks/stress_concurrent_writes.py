@@ -0,0 +1,96 @@
+"""Fire parallel /api/score posts at a multi-worker gunicorn and check none are lost.
+
+Usage:
+    python benchmarks/stress_concurrent_writes.py --workers 4 --posts 2000 [--journal]
+
+Runs against a throwaway DATA_DIR so it never touches data/scores.json.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from database import PinPuttDB  # noqa: E402
+
+ADMIN_KEY = 'stress_admin_key'
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(base_url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'{base_url}/api/leaderboard', timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError('gunicorn did not come up in time')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--players', type=int, default=50)
+    parser.add_argument('--journal', action='store_true', help='run with DB_JOURNAL enabled')
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='pinputt_stress_')
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, DATA_DIR=data_dir, ADMIN_KEY=ADMIN_KEY,
+               DB_JOURNAL='true' if args.journal else 'false')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-b', f'127.0.0.1:{port}', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_server(base_url)
+        requests.post(f'{base_url}/api/target', params={'key': ADMIN_KEY}, data={'target': 2500000}).raise_for_status()
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency)
+        session.mount('http://', adapter)
+
+        def post(i: int) -> bool:
+            initials = f'P{i % args.players:02d}'
+            response = session.post(f'{base_url}/api/score', data={'initials': initials, 'score': 2000000 + i})
+            return response.ok and response.json().get('status') == 'success'
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(post, range(args.posts)))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    accepted = sum(results)
+    stored = sum(len(p) for p in PinPuttDB(data_dir).load_data()['players'].values())
+    print(f'workers={args.workers} journal={args.journal} posts={args.posts} '
+          f'accepted={accepted} stored={stored} elapsed={elapsed:.2f}s '
+          f'throughput={args.posts / elapsed:.0f} req/s')
+    print(f'data dir: {data_dir}')
+    if stored != accepted:
+        print(f'LOST {accepted - stored} attempts')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
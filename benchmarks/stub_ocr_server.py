@@ -0,0 +1,132 @@
+"""A local stand-in for OCR.space, for load tests that exercise /api/process_image.
+
+Usage:
+    python benchmarks/stub_ocr_server.py [--port 8089] [--latency-ms 300] [--error-rate 0.02]
+
+Point the app at it with OCR_ENDPOINT_URLS (and any OCR_PRO_KEY):
+
+    OCR_ENDPOINT_URLS=http://127.0.0.1:8089/primary,http://127.0.0.1:8089/backup,http://127.0.0.1:8089/free
+
+Every POST reads the upload, waits a log-normal delay around --latency-ms
+and answers with a score display in OCR.space's response shape, including
+the TextOverlay word heights ScoreExtractor ranks by. --error-rate of the
+requests get OCR.space's error shape instead, so retries and hedging run.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def ocr_response(score: int, processing_ms: int) -> dict:
+    lines = [('PLAYER 1', 40), (f'{score:,}', 120), ('LEVEL 3', 40), ('CREDITS 0', 30)]
+    overlay = []
+    top = 20
+    for text, height in lines:
+        words = []
+        left = 30
+        for word in text.split():
+            words.append({'WordText': word, 'Left': left, 'Top': top, 'Height': height,
+                          'Width': len(word) * height // 2})
+            left += len(word) * height // 2 + 20
+        overlay.append({'LineText': text, 'Words': words, 'MaxHeight': height, 'MinTop': top})
+        top += height + 30
+    return {
+        'ParsedResults': [{
+            'TextOverlay': {'Lines': overlay, 'HasOverlay': True, 'Message': 'Total lines: %d' % len(overlay)},
+            'TextOrientation': '0',
+            'FileParseExitCode': 1,
+            'ParsedText': '\r\n'.join(text for text, _ in lines) + '\r\n',
+            'ErrorMessage': '',
+            'ErrorDetails': ''
+        }],
+        'OCRExitCode': 1,
+        'IsErroredOnProcessing': False,
+        'ProcessingTimeInMilliseconds': str(processing_ms),
+        'SearchablePDFURL': 'Searchable PDF not generated as it was not requested.'
+    }
+
+
+def error_response() -> dict:
+    return {
+        'OCRExitCode': 3,
+        'IsErroredOnProcessing': True,
+        'ErrorMessage': ['Timed out waiting for results'],
+        'ProcessingTimeInMilliseconds': '0'
+    }
+
+
+class StubOCRServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms: float = 300, error_rate: float = 0.0, seed: int = 1):
+        super().__init__(address, StubOCRHandler)
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def endpoint_urls(self) -> str:
+        """OCR_ENDPOINT_URLS value routing all three endpoints here."""
+        return ','.join(f'{self.url}/{name}' for name in ('primary', 'backup', 'free'))
+
+    def next_reply(self):
+        """(delay seconds, response) for the next request."""
+        with self._lock:
+            self.requests += 1
+            # Log-normal with the median at latency_ms, like real OCR calls' long tail
+            delay = self.latency_ms / 1000 * math.exp(self._rng.gauss(0, 0.5)) if self.latency_ms else 0.0
+            failed = self._rng.random() < self.error_rate
+            score = self._rng.randint(100000, 60000000) * 10
+        return delay, error_response() if failed else ocr_response(score, int(delay * 1000))
+
+    def start(self) -> 'StubOCRServer':
+        threading.Thread(target=self.serve_forever, name='stub-ocr', daemon=True).start()
+        return self
+
+
+class StubOCRHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        delay, reply = self.server.next_reply()
+        time.sleep(delay)
+        body = json.dumps(reply).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=300, help='median response delay')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    args = parser.parse_args()
+
+    server = StubOCRServer((args.host, args.port), args.latency_ms, args.error_rate)
+    print(f'OCR_ENDPOINT_URLS={server.endpoint_urls()}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+# changefeed.py
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class ChangeFeed:
+    """Fan-out of PinPuttDB change notifications to Server-Sent Event streams.
+
+    Registered as a PinPuttDB listener. Every change gets a sequence number
+    and is kept in a short ring buffer, so a reconnecting client that sends
+    Last-Event-ID gets the changes it missed. Changes written by other worker
+    processes are picked up by a single poller thread per process that runs
+    while at least one client is connected. stream_async serves the same
+    messages to clients on an asyncio event loop without a thread each.
+    """
+
+    def __init__(self, poll_changes: Callable[[], None], max_clients: int = 50,
+                 heartbeat: float = 15.0, max_duration: float = 600.0,
+                 poll_interval: float = 1.0, backlog: int = 256):
+        self.poll_changes = poll_changes
+        self.max_clients = max_clients
+        self.heartbeat = heartbeat
+        self.max_duration = max_duration
+        self.poll_interval = poll_interval
+        # Distinguishes this process's sequence numbers from other workers'
+        self.token = uuid.uuid4().hex[:8]
+        self._cond = threading.Condition()
+        self._events: deque = deque(maxlen=backlog)
+        self._seq = 0
+        self._clients = 0
+        self._poller: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        # (loop, asyncio.Event) of each stream_async client waiting for a change
+        self._async_waiters: set = set()
+
+    def publish(self, kind: str, payload: Dict) -> None:
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, kind, payload))
+            self._cond.notify_all()
+            for loop, event in self._async_waiters:
+                loop.call_soon_threadsafe(event.set)
+
+    def try_connect(self) -> bool:
+        """Reserve a client slot; False when the per-process cap is reached."""
+        with self._cond:
+            if self._clients >= self.max_clients:
+                return False
+            self._clients += 1
+            self._ensure_poller()
+            return True
+
+    def disconnect(self) -> None:
+        with self._cond:
+            self._clients -= 1
+
+    @property
+    def clients(self) -> int:
+        return self._clients
+
+    def _ensure_poller(self) -> None:
+        # A poller started before a gunicorn fork does not survive into the worker
+        if self._poller is not None and self._poller.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._poller = threading.Thread(target=self._poll_loop, name='changefeed-poller', daemon=True)
+        self._poller.start()
+
+    def _poll_loop(self) -> None:
+        while True:
+            time.sleep(self.poll_interval)
+            with self._cond:
+                if self._clients <= 0:
+                    self._poller = None
+                    return
+            try:
+                self.poll_changes()
+            except Exception:
+                # Storage hiccups must not kill the poller; the next poll retries
+                pass
+
+    def _resume_seq(self, last_event_id: Optional[str]) -> Tuple[int, bool]:
+        """Map Last-Event-ID to (seq to resume after, whether the client must reload)."""
+        with self._cond:
+            if last_event_id:
+                token, _, seq = last_event_id.partition(':')
+                if token == self.token and seq.isdigit():
+                    seq = int(seq)
+                    oldest = self._events[0][0] if self._events else self._seq + 1
+                    if seq >= oldest - 1:
+                        return seq, False
+                return self._seq, True
+            return self._seq, False
+
+    def _wait(self, after: int, timeout: float) -> List[Tuple[int, str, Dict]]:
+        with self._cond:
+            if self._seq <= after:
+                self._cond.wait(timeout)
+            return [event for event in self._events if event[0] > after]
+
+    async def _wait_async(self, after: int, timeout: float) -> List[Tuple[int, str, Dict]]:
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            if self._seq > after:
+                return [event for event in self._events if event[0] > after]
+            self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+        with self._cond:
+            return [event for event in self._events if event[0] > after]
+
+    def stream(self, last_event_id: Optional[str] = None) -> Iterator[str]:
+        """Yield SSE-formatted messages.
+        
+        The caller must have reserved a slot with try_connect and must call
+        disconnect when the response closes.
+        """
+        seq, reload = self._resume_seq(last_event_id)
+        yield f'retry: {int(self.poll_interval * 3000)}\n\n'
+        if reload:
+            yield self._format(seq, 'reload', {})
+        started = time.monotonic()
+        last_sent = started
+        while time.monotonic() - started < self.max_duration:
+            events = self._wait(seq, self.heartbeat)
+            if events and events[0][0] > seq + 1:
+                # Fell behind the ring buffer; the client has to refetch
+                seq = events[-1][0]
+                yield self._format(seq, 'reload', {})
+                last_sent = time.monotonic()
+                continue
+            for seq, kind, payload in events:
+                yield self._format(seq, kind, payload)
+                last_sent = time.monotonic()
+            if time.monotonic() - last_sent >= self.heartbeat:
+                yield ': heartbeat\n\n'
+                last_sent = time.monotonic()
+        # Ending the stream makes the client reconnect, which frees long-lived slots
+
+    async def stream_async(self, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """stream for an event loop: the same messages, awaiting changes instead of blocking."""
+        seq, reload = self._resume_seq(last_event_id)
+        yield f'retry: {int(self.poll_interval * 3000)}\n\n'
+        if reload:
+            yield self._format(seq, 'reload', {})
+        started = time.monotonic()
+        last_sent = started
+        while time.monotonic() - started < self.max_duration:
+            events = await self._wait_async(seq, self.heartbeat)
+            if events and events[0][0] > seq + 1:
+                seq = events[-1][0]
+                yield self._format(seq, 'reload', {})
+                last_sent = time.monotonic()
+                continue
+            for seq, kind, payload in events:
+                yield self._format(seq, kind, payload)
+                last_sent = time.monotonic()
+            if time.monotonic() - last_sent >= self.heartbeat:
+                yield ': heartbeat\n\n'
+                last_sent = time.monotonic()
+
+    def _format(self, seq: int, kind: str, payload: Dict) -> str:
+        return f'id: {self.token}:{seq}\nevent: {kind}\ndata: {json.dumps(payload)}\n\n'
@@ -16,7 +16,31 @@ class Config:
     
     # Game settings
     TARGET_SCORE = 2500000
-    OCR_CONFIDENCE_THRESHOLD = 0.8
+    OCR_CONFIDENCE_THRESHOLD = 0.8  # Local reads below this go to OCR.space
+    
+    # Storage settings
+    DB_BACKEND = os.getenv('DB_BACKEND', 'json')  # 'json' (scores.json) or 'sqlite'
+    DB_SQLITE_FILE = os.getenv('DB_SQLITE_FILE')  # Defaults to <DATA_DIR>/scores.db
+    DB_RELOAD_INTERVAL = float(os.getenv('DB_RELOAD_INTERVAL', 1.0))  # Seconds between scores.json change checks
+    DB_JOURNAL = os.getenv('DB_JOURNAL', 'false').lower() in ('1', 'true', 'yes')  # Append attempts to a journal
+    DB_JOURNAL_COMPACT_BYTES = int(os.getenv('DB_JOURNAL_COMPACT_BYTES', 1024 * 1024))  # Fold journal into scores.json past this size
+    
+    # Player pages
+    PLAYER_HISTORY_PAGE = 50  # Attempts per page of /api/player/<initials>/stats
+    PLAYER_HISTORY_MAX_PAGE = 500  # Largest ?limit= a client may ask for
+    
+    # Live leaderboard stream (Server-Sent Events)
+    SSE_MAX_CLIENTS = int(os.getenv('SSE_MAX_CLIENTS', 50))  # Per worker process; extra clients fall back to polling
+    SSE_HEARTBEAT_SECONDS = 15
+    SSE_MAX_DURATION_SECONDS = 600  # Streams are closed and re-established after this long
+    
+    # Async serving (uvicorn asgi:app)
+    ASGI_THREADS = int(os.getenv('ASGI_THREADS', 16))  # Threads for the routes that block: writes, stats, admin
+    
+    # Instrumentation (per worker process; scrape each worker or run one)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')  # Serve Prometheus metrics at /metrics
+    REQUEST_TIMING_LOG = os.getenv('REQUEST_TIMING_LOG', 'false').lower() in ('1', 'true', 'yes')  # Log each request's stage timings as JSON
+    PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', 'false').lower() in ('1', 'true', 'yes')  # Allow ?profile=1&key=<ADMIN_KEY> on any request
     
     # Security
     DATA_DIR = os.getenv('DATA_DIR', 'data')
@@ -28,10 +52,34 @@ class Config:
     OCR_FREE_KEY = os.getenv('OCR_FREE_KEY')
     OCR_ENGINE = 2  # More accurate but slower
     OCR_LANGUAGE = 'eng'
-    OCR_DEBUG = True  # Enable debug logging for OCR
+    OCR_DEBUG = os.getenv('OCR_DEBUG', 'false').lower() in ('1', 'true', 'yes')  # Print each OCR step
     OCR_MIN_SCORE_LENGTH = 5  # Minimum digits for a valid score
     OCR_MAX_SCORE_LENGTH = 15  # Maximum digits for a valid score
+    OCR_RESPONSE_DIR = os.getenv('OCR_RESPONSE_DIR')  # Save raw OCR.space responses here for benchmarks/bench_score_extraction.py
+    OCR_LOCAL = os.getenv('OCR_LOCAL', 'true').lower() in ('1', 'true', 'yes')  # Try the offline digit reader before OCR.space
+    OCR_ENDPOINT_URLS = [url for url in os.getenv('OCR_ENDPOINT_URLS', '').split(',') if url] or None  # Primary,backup,free; e.g. benchmarks/stub_ocr_server.py
+    OCR_TIMEOUT = float(os.getenv('OCR_TIMEOUT', 30))  # Seconds per OCR.space request
+    OCR_HEDGE = os.getenv('OCR_HEDGE', 'true').lower() in ('1', 'true', 'yes')  # Race the backup endpoint when the primary is slow
+    OCR_HEDGE_AFTER = float(os.getenv('OCR_HEDGE_AFTER')) if os.getenv('OCR_HEDGE_AFTER') else None  # Seconds; unset uses observed p95
+    OCR_WORKERS = int(os.getenv('OCR_WORKERS', 4))  # Background OCR threads per process
+    OCR_ASYNC_JOBS = int(os.getenv('OCR_ASYNC_JOBS', 200))  # OCR jobs in flight per process when served by asgi.py
+    OCR_ASYNC_POOL_SIZE = int(os.getenv('OCR_ASYNC_POOL_SIZE', 100))  # OCR.space connections per process under asgi.py
+    OCR_QUEUE_SIZE = int(os.getenv('OCR_QUEUE_SIZE', 32))  # Jobs waiting beyond this are refused
+    OCR_JOB_TTL = 600  # Seconds a finished job's result stays available
+    OCR_BATCH_PROCESSES = int(os.getenv('OCR_BATCH_PROCESSES', os.cpu_count() or 1))  # Decode/compress processes per batch upload
+    OCR_BATCH_MAX_IMAGES = int(os.getenv('OCR_BATCH_MAX_IMAGES', 500))  # Photos accepted from one batch zip
+    OCR_BATCH_MAX_BYTES = int(os.getenv('OCR_BATCH_MAX_BYTES', 200 * 1024 * 1024))  # Uncompressed size of a batch zip's photos, all read into memory
+    OCR_BATCH_MAX_UPLOAD_BYTES = int(os.getenv('OCR_BATCH_MAX_UPLOAD_BYTES', OCR_BATCH_MAX_BYTES))  # Request body of one batch upload; photos barely compress
+    OCR_CACHE_SIZE = int(os.getenv('OCR_CACHE_SIZE', 256))  # OCR results kept in memory, keyed by image hash
+    OCR_CACHE_DISK = os.getenv('OCR_CACHE_DISK', 'true').lower() in ('1', 'true', 'yes')  # Also keep them under <DATA_DIR>/ocr_cache
+    OCR_CACHE_TTL = int(os.getenv('OCR_CACHE_TTL', 24 * 3600))  # Seconds a result stays in the disk cache
+    OCR_CACHE_DISK_BYTES = int(os.getenv('OCR_CACHE_DISK_BYTES', 20 * 1024 * 1024))  # Oldest results are evicted past this
+    OCR_CACHE_PERCEPTUAL = os.getenv('OCR_CACHE_PERCEPTUAL', 'false').lower() in ('1', 'true', 'yes')  # Match re-encoded copies of a photo, once the local reader agrees on the score
     
     # Upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+    UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', 12 * 1024 * 1024))  # Largest single photo, refused as it streams in
+    UPLOAD_MAX_PIXELS = int(os.getenv('UPLOAD_MAX_PIXELS', 40_000_000))  # Refused from the header, before decoding; a phone photo is ~12M
+    UPLOAD_SPOOL_BYTES = int(os.getenv('UPLOAD_SPOOL_BYTES', 1024 * 1024))  # Kept in memory per upload, then spilled to a temp file in UPLOADS_DIR
+    UPLOAD_MAX_IN_FLIGHT = int(os.getenv('UPLOAD_MAX_IN_FLIGHT', 8))  # Photo uploads read at once per process; more get 429
\ No newline at end of file
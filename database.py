@@ -1,120 +1,588 @@
 # database.py
+import glob
 import json
 import os
 from datetime import datetime
 import shutil
-from typing import Dict, List, Union, Optional
+import bisect
+import math
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from attempt_store import PlayerAttempts, check_int64, snapshot_from_json, snapshot_to_json, summarize_players
+from metrics import REGISTRY, record_stage, stage
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within one process
+    fcntl = None
+
+STORAGE_BYTES = REGISTRY.counter(
+    'pinputt_storage_bytes_total', 'Bytes read and written by the scores.json store', ('operation',))
+
+def journal_path(snapshot_file: str) -> str:
+    return f'{os.path.splitext(snapshot_file)[0]}.journal.jsonl'
+
+def _stat_file(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+def _apply_attempt(data: Dict, initials: str, attempt: Dict) -> None:
+    if initials not in data['players']:
+        data['players'][initials] = PlayerAttempts()
+    data['players'][initials].append(attempt)
+
+def replay_journal(data: Dict, journal_file: str, offset: int = 0,
+                   apply: Callable[[Dict, str, Dict], None] = None) -> int:
+    """Apply journal entries from byte offset onward to data.
+    
+    Entries already folded into the snapshot (seq <= data['journal_seq']) are
+    skipped, as is a trailing partial line from an interrupted append.
+    Returns the offset just past the last complete line.
+    """
+    if not os.path.exists(journal_file):
+        return 0
+    with open(journal_file, 'rb') as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                break
+            offset += len(raw)
+            entry = json.loads(raw)
+            if entry['seq'] <= data.get('journal_seq', 0):
+                continue
+            (apply or _apply_attempt)(data, entry['initials'], entry['attempt'])
+            data['journal_seq'] = entry['seq']
+    return offset
+
+
+def appended_attempts(old: Dict, new: Dict) -> Optional[List[Tuple[str, Dict]]]:
+    """(initials, attempt) of each attempt in new that old lacks, oldest first.
+
+    None unless new is old with attempts appended, e.g. after a reset or a
+    hand edit of scores.json.
+    """
+    old_players, new_players = old['players'], new['players']
+    appended = []
+    for initials, player in new_players.items():
+        known = old_players.get(initials)
+        if known is None:
+            start = 0
+        elif player.timestamps[:len(known)] != known.timestamps:
+            return None
+        else:
+            start = len(known)
+        appended.extend((initials, player.attempt(index)) for index in range(start, len(player)))
+    if any(initials not in new_players for initials in old_players):
+        return None
+    appended.sort(key=lambda item: item[1]['timestamp'])
+    return appended
+
+def load_snapshot(snapshot_file: str) -> Dict:
+    """Load a scores.json-format file with its journal, if any, replayed on top."""
+    with open(snapshot_file, 'r', encoding='utf-8') as f:
+        data = snapshot_from_json(json.load(f))
+    replay_journal(data, journal_path(snapshot_file))
+    return data
+
+SCORE_BANDS = 8
+DISTANCE_PERCENTILES = (50, 90, 99)
+
+def score_band_bounds(min_score: int, max_score: int, count: int) -> List[Tuple[float, float]]:
+    """[lower, upper) of each equal-width band between min_score and max_score."""
+    band_size = (max_score - min_score) / SCORE_BANDS if count > 1 else 1
+    return [(min_score + (i * band_size), min_score + (i * band_size) + band_size) for i in range(SCORE_BANDS)]
+
+def format_score_bands(bounds: List[Tuple[float, float]], counts: List[int], total: int) -> List[Dict]:
+    return [{
+        'range': f'{int(lower):,}-{int(upper):,}',
+        'count': count,
+        'percentage': round((count / total) * 100, 1)
+    } for (lower, upper), count in zip(bounds, counts)]
+
+def nearest_rank(ordered: Sequence[int], pct: float) -> Optional[int]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * pct / 100) - 1))]
+
+
+class ScoreStats:
+    """Running aggregates over every attempt, so stats never rescan the data.
+    
+    Scores and distances are kept in sorted arrays, an exact and mergeable
+    quantile sketch: score bands cost two bisects per band and distance
+    percentiles an index lookup. Insertion is a memmove, cheap next to the
+    write that accompanies every attempt. Sorting is the slowest part of a
+    load, so after rebuild() the arrays are only built on the first read.
+    """
+    
+    def __init__(self):
+        self.rebuild({})
+    
+    def rebuild(self, players: Dict[str, PlayerAttempts]) -> None:
+        # players is the live dict, so attempts applied before the first
+        # read are picked up by the deferred sort
+        self._players = players
+        self._scores: Optional[array] = None
+        self._distances: Optional[array] = None
+        self._total = 0
+    
+    def _columns(self) -> Tuple[array, array]:
+        if self._scores is None:
+            scores, distances = array('q'), array('q')
+            for player in self._players.values():
+                scores.extend(player.scores)
+                distances.extend(player.distances)
+            self._total = sum(scores)
+            self._scores = array('q', sorted(scores))
+            self._distances = array('q', sorted(distances))
+        return self._scores, self._distances
+    
+    def rebind(self, players: Dict[str, PlayerAttempts]) -> None:
+        """Follow a reloaded copy of the players whose new attempts were add()ed."""
+        self._players = players
+    
+    def add(self, attempt: Dict) -> None:
+        if self._scores is None:
+            return
+        bisect.insort(self._scores, attempt['score'])
+        bisect.insort(self._distances, attempt['distance'])
+        self._total += attempt['score']
+    
+    @property
+    def count(self) -> int:
+        return len(self._columns()[0])
+    
+    @property
+    def total(self) -> int:
+        self._columns()
+        return self._total
+    
+    @property
+    def best_score(self) -> int:
+        scores = self._columns()[0]
+        return scores[-1] if scores else 0
+    
+    def score_bands(self) -> List[Dict]:
+        scores = self._columns()[0]
+        if not scores:
+            return []
+        bounds = score_band_bounds(scores[0], scores[-1], len(scores))
+        counts = [bisect.bisect_left(scores, upper) - bisect.bisect_left(scores, lower)
+                  for lower, upper in bounds]
+        return format_score_bands(bounds, counts, len(scores))
+    
+    def distance_percentiles(self) -> Dict[str, Optional[int]]:
+        distances = self._columns()[1]
+        return {f'p{pct}': nearest_rank(distances, pct) for pct in DISTANCE_PERCENTILES}
+
+
+class Leaderboard:
+    """Best attempt per player, kept sorted by distance as attempts arrive.
+    
+    Entries are (distance, player_order, row) tuples in a bisect-ordered list;
+    player_order is first-appearance order, which breaks distance ties the
+    same way a stable sort over data['players'] would.
+    """
+    
+    def __init__(self):
+        self._entries: List[Tuple[int, int, Dict]] = []
+        self._best: Dict[str, Tuple[int, int, Dict]] = {}
+        self._order: Dict[str, int] = {}
+    
+    def rebuild(self, players: Dict) -> None:
+        self._entries = []
+        self._best = {}
+        self._order = {}
+        for initials, player in players.items():
+            self._order[initials] = len(self._order)
+            best = player.best_index()
+            if best is not None:
+                self._entries.append(self._make_entry(initials, player.attempt(best)))
+        self._entries.sort(key=lambda entry: entry[:2])
+    
+    def update(self, initials: str, attempt: Dict) -> Optional[Dict]:
+        """Record an attempt; returns the player's new row if it improved their best."""
+        if initials not in self._order:
+            self._order[initials] = len(self._order)
+        current = self._best.get(initials)
+        if current is not None and attempt['distance'] >= current[0]:
+            return None
+        if current is not None:
+            del self._entries[bisect.bisect_left(self._entries, current[:2])]
+        entry = self._make_entry(initials, attempt)
+        self._entries.insert(bisect.bisect_left(self._entries, entry[:2]), entry)
+        return entry[2]
+    
+    def _make_entry(self, initials: str, attempt: Dict) -> Tuple[int, int, Dict]:
+        entry = (attempt['distance'], self._order[initials], {
+            'initials': initials,
+            'score': attempt['score'],
+            'distance': attempt['distance'],
+            'timestamp': attempt['timestamp']
+        })
+        self._best[initials] = entry
+        return entry
+    
+    def top(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        end = None if limit is None else offset + limit
+        return [entry[2] for entry in self._entries[offset:end]]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
 
 class PinPuttDB:
-    def __init__(self, data_dir: str):
+    def __init__(self, data_dir: str, reload_interval: float = 1.0,
+                 journal: bool = False, compact_bytes: int = 1024 * 1024):
         self.data_dir = data_dir
         self.scores_file = os.path.join(data_dir, 'scores.json')
+        self.journal_file = journal_path(self.scores_file)
+        self.lock_file = os.path.join(data_dir, 'scores.lock')
+        # How often (seconds) reads may stat scores.json to pick up external edits
+        self.reload_interval = reload_interval
+        # In journal mode attempts are appended to journal_file and folded into
+        # scores.json once the journal grows past compact_bytes
+        self.journal = journal
+        self.compact_bytes = compact_bytes
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_fd = None
+        self._generation = -1
+        self._data: Optional[Dict] = None
+        self._file_stamp: Optional[Tuple[int, int, int]] = None
+        self._journal_offset = 0
+        self._last_check = 0.0
+        self._leaderboard = Leaderboard()
+        self._stats = ScoreStats()
+        self._listeners: List[Callable[[str, Dict], None]] = []
+        self._version = 0
         self.init_db()
     
     def init_db(self) -> None:
         if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
+            os.makedirs(self.data_dir, exist_ok=True)
         
-        if not os.path.exists(self.scores_file):
-            initial_data = {
-                'current_target': None,
-                'events': [],
-                'players': {}
-            }
-            self.save_data(initial_data)
+        with self._write_lock(refresh=False):
+            if not os.path.exists(self.scores_file):
+                initial_data = {
+                    'current_target': None,
+                    'events': [],
+                    'players': {}
+                }
+                self.save_data(initial_data)
+            else:
+                self._reload()
+    
+    @contextmanager
+    def _write_lock(self, refresh: bool = True):
+        """Serialize writers across threads and across processes sharing data_dir.
+        
+        On entry the resident data is brought up to date with disk, so a
+        read-modify-write never starts from another worker's stale state.
+        """
+        with self._lock:
+            outermost = self._lock_depth == 0
+            if outermost and fcntl is not None:
+                # Opened per acquisition: flock is tied to the open file, and a
+                # descriptor inherited across a gunicorn fork would be shared.
+                self._lock_fd = open(self.lock_file, 'a+', encoding='utf-8')
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                if outermost and refresh:
+                    self._sync_locked()
+                yield
+            finally:
+                self._lock_depth -= 1
+                if outermost and self._lock_fd is not None:
+                    self._generation = self._read_generation() + 1
+                    self._lock_fd.seek(0)
+                    self._lock_fd.truncate()
+                    self._lock_fd.write(str(self._generation))
+                    self._lock_fd.flush()
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    self._lock_fd.close()
+                    self._lock_fd = None
+    
+    def _sync_locked(self) -> None:
+        if self._lock_fd is None:
+            self._refresh(force=True)
+            return
+        # Every writer bumps the generation in the lock file. If another
+        # process wrote but the file stamp looks unchanged (inode reuse within
+        # one mtime tick), fall back to a full reload.
+        generation = self._read_generation()
+        if generation != self._generation and not self._refresh(force=True):
+            self._reload()
+        self._generation = generation
+    
+    def _read_generation(self) -> int:
+        self._lock_fd.seek(0)
+        raw = self._lock_fd.read().strip()
+        return int(raw) if raw else 0
+    
+    def add_listener(self, listener: Callable[[str, Dict], None]) -> None:
+        """Call listener(kind, payload) after every change to the data.
+        
+        kind is 'attempt', 'target', 'reset', or 'reload' when changes made
+        by another process were picked up from disk and were more than new
+        attempts and a new target, e.g. a reset.
+        """
+        self._listeners.append(listener)
+    
+    def _notify(self, kind: str, payload: Dict) -> None:
+        self._version += 1
+        for listener in self._listeners:
+            listener(kind, payload)
+    
+    @property
+    def version(self) -> int:
+        """Counter bumped on every change, including ones picked up from disk."""
+        with self._lock:
+            self._refresh()
+            return self._version
+    
+    def poll_changes(self) -> None:
+        """Pick up changes other processes made on disk, notifying listeners."""
+        with self._lock:
+            self._refresh()
+    
+    def _reload(self) -> None:
+        old = self._data
+        stamp = _stat_file(self.scores_file)
+        with stage('storage_load'):
+            with open(self.scores_file, 'r', encoding='utf-8') as f:
+                self._data = snapshot_from_json(json.load(f))
+                STORAGE_BYTES.inc(f.tell(), operation='load')
+        self._file_stamp = stamp
+        # Another worker's save usually only appends attempts: send those as
+        # deltas, so live pages need not refetch the whole board
+        appended = appended_attempts(old, self._data) if old is not None else None
+        target_changed = appended is not None and self._data['current_target'] != old['current_target']
+        deltas = bool(appended) or target_changed
+        if deltas:
+            self._stats.rebind(self._data['players'])
+            if target_changed:
+                self._notify('target', {'target': self._data['current_target']})
+            for initials, attempt in appended:
+                self._index_replayed_attempt(initials, attempt)
+        else:
+            with stage('leaderboard_rebuild'):
+                self._leaderboard.rebuild(self._data['players'])
+            self._stats.rebuild(self._data['players'])
+        with stage('journal_replay'):
+            self._journal_offset = replay_journal(
+                self._data, self.journal_file,
+                apply=self._apply_replayed_attempt if deltas else self._apply_attempt)
+        STORAGE_BYTES.inc(self._journal_offset, operation='journal_replay')
+        self._last_check = time.monotonic()
+        if old is not None and not deltas:
+            self._notify('reload', {})
+    
+    def _replay_journal_tail(self) -> None:
+        offset = self._journal_offset
+        with stage('journal_replay'):
+            self._journal_offset = replay_journal(self._data, self.journal_file, offset,
+                                                 apply=self._apply_replayed_attempt)
+        STORAGE_BYTES.inc(self._journal_offset - offset, operation='journal_replay')
+    
+    def _apply_attempt(self, data: Dict, initials: str, attempt: Dict) -> Optional[Dict]:
+        _apply_attempt(data, initials, attempt)
+        return self._index_attempt(initials, attempt)
+    
+    def _index_attempt(self, initials: str, attempt: Dict) -> Optional[Dict]:
+        self._stats.add(attempt)
+        return self._leaderboard.update(initials, attempt)
+    
+    def _apply_replayed_attempt(self, data: Dict, initials: str, attempt: Dict) -> None:
+        # Another worker's submission, picked up from the shared journal
+        _apply_attempt(data, initials, attempt)
+        self._index_replayed_attempt(initials, attempt)
+    
+    def _index_replayed_attempt(self, initials: str, attempt: Dict) -> None:
+        entry = self._index_attempt(initials, attempt)
+        self._notify('attempt', {'initials': initials, 'attempt': attempt, 'entry': entry})
     
     def save_data(self, data: Dict) -> None:
-        with open(self.scores_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        # Write to a temp file and rename so readers never see a partial file
+        tmp_file = f'{self.scores_file}.{os.getpid()}.tmp'
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot_to_json(data), f, separators=(',', ':'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    STORAGE_BYTES.inc(f.tell(), operation='save')
+                os.replace(tmp_file, self.scores_file)
+            except Exception:
+                # Memory may now be ahead of disk; force a reload on next read
+                self._data = None
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+                raise
+            record_stage('storage_save', time.perf_counter() - started)
+            if data is not self._data:
+                self._data = data
+                with stage('leaderboard_rebuild'):
+                    self._leaderboard.rebuild(data['players'])
+                self._stats.rebuild(data['players'])
+            self._file_stamp = _stat_file(self.scores_file)
+            self._last_check = time.monotonic()
+    
+    def _refresh(self, force: bool = False) -> bool:
+        """Pick up changes made on disk by other processes; returns True if any."""
+        if self._data is None:
+            self._reload()
+            return True
+        if not force and time.monotonic() - self._last_check < self.reload_interval:
+            return False
+        self._last_check = time.monotonic()
+        if _stat_file(self.scores_file) != self._file_stamp:
+            self._reload()
+            return True
+        journal_size = _file_size(self.journal_file)
+        if journal_size < self._journal_offset:
+            self._reload()
+            return True
+        if journal_size > self._journal_offset:
+            self._replay_journal_tail()
+            return True
+        return False
     
     def load_data(self) -> Dict:
-        with open(self.scores_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        """Return the resident data, reloading only if scores.json changed on disk."""
+        with self._lock:
+            self._refresh()
+            return self._data
     
-    def set_target(self, target_score: int) -> None:
-        data = self.load_data()
-        data['current_target'] = target_score
+    def compact(self) -> None:
+        """Fold the attempt journal into scores.json and truncate it.
+        
+        The snapshot records the last journal sequence it contains, so a crash
+        between the save and the truncate cannot replay attempts twice.
+        """
+        with self._write_lock():
+            self._compact(self._data)
+    
+    def _compact(self, data: Dict) -> None:
         self.save_data(data)
+        with open(self.journal_file, 'w', encoding='utf-8'):
+            pass
+        self._journal_offset = 0
+    
+    def _append_journal(self, data: Dict, records: List[Tuple[str, Dict]]) -> None:
+        seq = data.get('journal_seq', 0)
+        lines = []
+        for initials, attempt in records:
+            seq += 1
+            lines.append(json.dumps({'seq': seq, 'initials': initials, 'attempt': attempt}) + '\n')
+        with stage('journal_append'), open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+            STORAGE_BYTES.inc(f.tell() - self._journal_offset, operation='journal_append')
+            self._journal_offset = f.tell()
+        data['journal_seq'] = seq
+    
+    def set_target(self, target_score: int) -> None:
+        check_int64('target', target_score)
+        with self._write_lock():
+            data = self.load_data()
+            data['current_target'] = target_score
+            if self.journal:
+                self._compact(data)
+            else:
+                self.save_data(data)
+            self._notify('target', {'target': target_score})
     
     def add_attempt(self, initials: str, score: int) -> Dict:
-        data = self.load_data()
-        timestamp = datetime.now().isoformat()
-        
-        target = data['current_target']
-        if target is None:
-            raise ValueError("No target score has been set")
-        
-        distance = abs(score - target)
-        attempt = {
-            'score': score,
-            'timestamp': timestamp,
-            'distance': distance,
-            'target': target
-        }
-        
-        if initials not in data['players']:
-            data['players'][initials] = {
-                'attempts': [],
-                'best_distance': None
-            }
+        return self.add_attempts([(initials, score)])[0]
+    
+    def add_attempts(self, scores: List[Tuple[str, int]]) -> List[Dict]:
+        """Record several (initials, score) attempts with a single storage write."""
+        with self._write_lock():
+            data = self.load_data()
+            timestamp = datetime.now().isoformat()
         
-        player = data['players'][initials]
-        player['attempts'].append(attempt)
+            target = data['current_target']
+            if target is None:
+                raise ValueError("No target score has been set")
         
-        if player['best_distance'] is None or distance < player['best_distance']:
-            player['best_distance'] = distance
+            records = [(initials, {
+                'score': score,
+                'timestamp': timestamp,
+                'distance': abs(score - target),
+                'target': target
+            }) for initials, score in scores]
+            # Checked before anything is journaled or applied: a value the
+            # int64 columns cannot hold would fail halfway through the batch
+            for _, attempt in records:
+                for column in ('score', 'distance', 'target'):
+                    check_int64(column, attempt[column])
         
-        self.save_data(data)
-        return attempt
+            if self.journal:
+                self._append_journal(data, records)
+            entries = [self._apply_attempt(data, initials, attempt) for initials, attempt in records]
+            if not self.journal:
+                self.save_data(data)
+            elif self._journal_offset >= self.compact_bytes:
+                self._compact(data)
+            for (initials, attempt), entry in zip(records, entries):
+                self._notify('attempt', {'initials': initials, 'attempt': attempt, 'entry': entry})
+            return [attempt for _, attempt in records]
     
-    def get_leaderboard(self) -> List[Dict]:
-        data = self.load_data()
-        leaderboard = []
-        
-        for initials, player in data['players'].items():
-            if player['attempts']:
-                best_attempt = min(player['attempts'], 
-                                 key=lambda x: x['distance'])
-                
-                leaderboard.append({
-                    'initials': initials,
-                    'score': best_attempt['score'],
-                    'distance': best_attempt['distance'],
-                    'timestamp': best_attempt['timestamp']
-                })
-        
-        return sorted(leaderboard, key=lambda x: x['distance'])
+    def get_leaderboard(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        with self._lock:
+            self._refresh()
+            return self._leaderboard.top(limit, offset)
     
-    def get_player_stats(self, initials: str) -> Dict:
-        data = self.load_data()
-        if initials not in data['players']:
-            return {
-                'total_attempts': 0,
-                'best_score': 0,
-                'average_score': 0,
-                'best_distance': 0,
-                'attempts': []
-            }
-            
-        player = data['players'][initials]
-        attempts = player['attempts']
-        if not attempts:
+    def get_leaderboard_count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._leaderboard)
+    
+    def get_player_stats(self, initials: str, limit: Optional[int] = None,
+                         before: Optional[int] = None) -> Dict:
+        """The player's running totals and a page of attempts, newest first.
+
+        Pass next_before back as before for the next older page; it is None
+        on the last page.
+        """
+        with self._lock:
+            self._refresh()
+            player = self._data['players'].get(initials)
+            if player is None or not len(player):
+                return {
+                    'total_attempts': 0,
+                    'best_score': 0,
+                    'average_score': 0,
+                    'best_distance': 0,
+                    'attempts': [],
+                    'next_before': None
+                }
+            attempts, next_before = player.page(limit, before)
             return {
-                'total_attempts': 0,
-                'best_score': 0,
-                'average_score': 0,
-                'best_distance': 0,
-                'attempts': []
+                'total_attempts': len(player),
+                'best_score': player.best_score,
+                'average_score': int(player.total_score / len(player)),
+                'best_distance': player.best_distance,
+                'attempts': attempts,
+                'next_before': next_before
             }
-        
-        scores = [a['score'] for a in attempts]
-        return {
-            'total_attempts': len(attempts),
-            'best_score': max(scores),
-            'average_score': int(sum(scores) / len(scores)),
-            'best_distance': player['best_distance'],
-            'attempts': attempts
-        }
     
     def get_current_target(self) -> Optional[int]:
         data = self.load_data()
@@ -124,73 +592,64 @@ class PinPuttDB:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         archive_file = os.path.join(self.data_dir, f'closedscores_{timestamp}.json')
         
-        if os.path.exists(self.scores_file):
-            shutil.copy2(self.scores_file, archive_file)
-        
-        data = self.load_data()
-        new_data = {
-            'current_target': data['current_target'],
-            'events': [],
-            'players': {}
-        }
-        self.save_data(new_data)
+        with self._write_lock():
+            data = self.load_data()
+            # Hard-link the snapshot and move the journal aside instead of
+            # copying; the fresh scores.json below replaces the live name.
+            try:
+                os.link(self.scores_file, archive_file)
+            except OSError:
+                shutil.copy2(self.scores_file, archive_file)
+            if os.path.exists(self.journal_file):
+                os.replace(self.journal_file, journal_path(archive_file))
+            self._journal_offset = 0
+            
+            new_data = {
+                'current_target': data['current_target'],
+                'events': [],
+                'players': {},
+                'journal_seq': data.get('journal_seq', 0)
+            }
+            self.save_data(new_data)
+            self._notify('reset', {'target': new_data['current_target']})
         
         return archive_file
     
+    def archives(self) -> List[Tuple[str, str]]:
+        """(archive, closed_at) of every reset_scores archive, oldest first."""
+        archives = []
+        for archive_file in sorted(glob.glob(os.path.join(self.data_dir, 'closedscores_*.json'))):
+            stamp = os.path.splitext(os.path.basename(archive_file))[0][len('closedscores_'):]
+            archives.append((archive_file, datetime.strptime(stamp, '%Y%m%d_%H%M%S').isoformat()))
+        return archives
+    
+    def archive_summary(self, archive: str) -> Dict[str, Dict]:
+        """Best attempt and attempt count per player in an archive from reset_scores."""
+        return summarize_players(load_snapshot(archive)['players'])
+    
     def get_enhanced_stats(self) -> Dict:
-        data = self.load_data()
-        all_attempts = []
-        stats = {
-            'total_attempts': 0,
-            'unique_players': len(data['players']),
-            'average_score': 0,
-            'best_score': 0,
-            'top_players': [],
-            'score_distribution': []
-        }
-
-        for initials, player in data['players'].items():
-            attempts = player.get('attempts', [])
-            if attempts:
-                all_attempts.extend(attempts)
-                best_attempt = min(attempts, key=lambda x: x['distance'])
-                stats['top_players'].append({
-                    'initials': initials,
-                    'best_score': best_attempt['score'],
-                    'distance': best_attempt['distance'],
-                    'total_attempts': len(attempts)
+        with self._lock:
+            self._refresh()
+            stats = {
+                'total_attempts': 0,
+                'unique_players': len(self._data['players']),
+                'average_score': 0,
+                'best_score': 0,
+                'top_players': [],
+                'score_distribution': [],
+                'distance_percentiles': self._stats.distance_percentiles()
+            }
+            if self._stats.count:
+                stats.update({
+                    'total_attempts': self._stats.count,
+                    'average_score': int(self._stats.total / self._stats.count),
+                    'best_score': self._stats.best_score,
+                    'score_distribution': self._stats.score_bands(),
+                    'top_players': [{
+                        'initials': entry['initials'],
+                        'best_score': entry['score'],
+                        'distance': entry['distance'],
+                        'total_attempts': len(self._data['players'][entry['initials']])
+                    } for entry in self._leaderboard.top()]
                 })
-
-        if all_attempts:
-            scores = [a['score'] for a in all_attempts]
-            stats.update({
-                'total_attempts': len(all_attempts),
-                'average_score': int(sum(scores) / len(scores)),
-                'best_score': max(scores),
-                'score_distribution': self._calculate_score_bands(scores)
-            })
-            stats['top_players'].sort(key=lambda x: x['distance'])
-
-        return stats
-    
-    def _calculate_score_bands(self, scores: List[int]) -> List[Dict]:
-        if not scores:
-            return []
-            
-        min_score = min(scores)
-        max_score = max(scores)
-        band_size = (max_score - min_score) / 8 if len(scores) > 1 else 1
-        bands = []
-        
-        for i in range(8):
-            lower = min_score + (i * band_size)
-            upper = lower + band_size
-            count = sum(1 for score in scores if lower <= score < upper)
-            
-            bands.append({
-                'range': f'{int(lower):,}-{int(upper):,}',
-                'count': count,
-                'percentage': round((count / len(scores)) * 100, 1)
-            })
-        
-        return bands
\ No newline at end of file
+            return stats
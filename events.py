@@ -0,0 +1,197 @@
+# events.py
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from database import _stat_file
+
+DEFAULT_EVENT = 'default'
+EVENT_SLUG = re.compile(r'^[a-z0-9][a-z0-9_-]{0,39}$')
+
+
+class UnknownEvent(LookupError):
+    pass
+
+
+class ArchiveIndex:
+    """Per-player summaries of every archived event, one JSON line per archive.
+
+    Written once when an event is reset, so a player's history across all
+    events and archives is a dict lookup instead of opening and parsing
+    every closedscores_*.json. Other workers' appends are picked up by
+    reading past the last offset, as with the attempt journal.
+    """
+
+    def __init__(self, index_file: str):
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._indexed: Set[Tuple[str, str]] = set()
+        self._by_player: Dict[str, List[Dict]] = {}
+
+    def _refresh(self) -> None:
+        try:
+            size = os.path.getsize(self.index_file)
+        except FileNotFoundError:
+            return
+        if size < self._offset:
+            # Replaced underneath us; start over
+            self._offset = 0
+            self._indexed = set()
+            self._by_player = {}
+        if size == self._offset:
+            return
+        with open(self.index_file, 'rb') as f:
+            f.seek(self._offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                self._offset += len(raw)
+                self._load_line(json.loads(raw))
+
+    def _load_line(self, line: Dict) -> None:
+        key = (line['event'], line['archive'])
+        if key in self._indexed:
+            # Two workers indexed the same archive at startup
+            return
+        self._indexed.add(key)
+        for initials, best in line['players'].items():
+            self._by_player.setdefault(initials, []).append({
+                'event': line['event'],
+                'archive': line['archive'],
+                'closed_at': line['closed_at'],
+                **best
+            })
+
+    def contains(self, event: str, archive: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return (event, os.path.basename(archive)) in self._indexed
+
+    def add(self, event: str, archive: str, closed_at: str, players: Dict[str, Dict]) -> None:
+        line = {
+            'event': event,
+            'archive': os.path.basename(archive),
+            'closed_at': closed_at,
+            'players': players
+        }
+        with self._lock:
+            self._refresh()
+            with open(self.index_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(line, separators=(',', ':')) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._refresh()
+
+    def player_history(self, initials: str) -> Dict:
+        with self._lock:
+            self._refresh()
+            archives = sorted(self._by_player.get(initials, []), key=lambda entry: entry['closed_at'])
+        best = min(archives, key=lambda entry: entry['distance'], default=None)
+        return {
+            'initials': initials,
+            'total_attempts': sum(entry['total_attempts'] for entry in archives),
+            'best_distance': best['distance'] if best else None,
+            'best': best,
+            'archives': archives
+        }
+
+
+class EventRegistry:
+    """Named events, each stored in its own partition with its own target.
+
+    The default event is the original data directory; every other event
+    gets data/events/<slug>/ with its own scores file, journal and lock, so
+    a busy event's writes and reads never touch another event's data.
+    Event metadata lives in data/events.json; archived events are summarized
+    into an ArchiveIndex as they are reset.
+    """
+
+    def __init__(self, data_dir: str, default_db, open_db: Callable[[str], object]):
+        self.data_dir = data_dir
+        self.events_dir = os.path.join(data_dir, 'events')
+        self.events_file = os.path.join(data_dir, 'events.json')
+        self.open_db = open_db
+        self.index = ArchiveIndex(os.path.join(data_dir, 'archive_index.jsonl'))
+        self._lock = threading.RLock()
+        self._meta: Dict[str, Dict] = {}
+        self._meta_stamp = None
+        self._dbs = {DEFAULT_EVENT: default_db}
+        self._load_meta()
+
+    def _load_meta(self) -> None:
+        stamp = _stat_file(self.events_file)
+        if stamp is None or stamp == self._meta_stamp:
+            return
+        with open(self.events_file, 'r', encoding='utf-8') as f:
+            self._meta = json.load(f)['events']
+        self._meta_stamp = stamp
+
+    def _save_meta(self) -> None:
+        tmp_file = f'{self.events_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'events': self._meta}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.events_file)
+        self._meta_stamp = _stat_file(self.events_file)
+
+    def list_events(self) -> List[Dict]:
+        with self._lock:
+            self._load_meta()
+            return [{'slug': DEFAULT_EVENT, 'name': 'Default'}] + [
+                {'slug': slug, **meta} for slug, meta in self._meta.items()]
+
+    def create(self, slug: str, name: str, machine: Optional[str] = None,
+               venue: Optional[str] = None) -> Dict:
+        if not EVENT_SLUG.match(slug):
+            raise ValueError("Event slug must be 1-40 lowercase letters, digits, '-' or '_'")
+        with self._lock:
+            self._load_meta()
+            if slug == DEFAULT_EVENT or slug in self._meta:
+                raise ValueError(f"Event {slug} already exists")
+            self._meta[slug] = {
+                'name': name or slug,
+                'machine': machine,
+                'venue': venue,
+                'created_at': datetime.now().isoformat()
+            }
+            self._save_meta()
+            return {'slug': slug, **self._meta[slug]}
+
+    def get(self, slug: str):
+        """The event's store (PinPuttDB or SQLitePinPuttDB), opened on first use."""
+        with self._lock:
+            store = self._dbs.get(slug)
+            if store is not None:
+                return store
+            self._load_meta()
+            if slug not in self._meta:
+                raise UnknownEvent(slug)
+            store = self._dbs[slug] = self.open_db(os.path.join(self.events_dir, slug))
+            return store
+
+    def reset(self, slug: str) -> str:
+        """Archive the event's attempts and add them to the archive index."""
+        store = self.get(slug)
+        archive = store.reset_scores()
+        self.index.add(slug, archive, datetime.now().isoformat(), store.archive_summary(archive))
+        return archive
+
+    def sync_index(self) -> int:
+        """Index archives made before the index existed, or lost to a crash; returns how many.
+
+        Cheap when nothing is missing, and safe for several workers at once,
+        so the app runs it at every start.
+        """
+        added = 0
+        for event in self.list_events():
+            store = self.get(event['slug'])
+            for archive, closed_at in store.archives():
+                if not self.index.contains(event['slug'], archive):
+                    self.index.add(event['slug'], archive, closed_at, store.archive_summary(archive))
+                    added += 1
+        return added
@@ -0,0 +1,17 @@
+# gunicorn.conf.py
+# Picked up automatically by `gunicorn app:app` from the project directory.
+#
+# /api/leaderboard/stream holds its connection open, so sync workers would
+# be tied up one per viewer. gevent serves streams as greenlets; without it
+# gthread at least confines each stream to one thread of a worker.
+import os
+
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+
+try:
+    import gevent  # noqa: F401
+    worker_class = 'gevent'
+    worker_connections = 1000
+except ImportError:
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', 64))
@@ -0,0 +1,54 @@
+# http_cache.py
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+
+@dataclass
+class CachedBody:
+    version: int
+    body: bytes
+    etag: str
+    gzipped: Optional[bytes] = None
+
+
+class VersionedResponseCache:
+    """Serialized JSON bodies keyed by request, valid for one data version.
+
+    The ETag is a hash of the body rather than the version number, so workers
+    holding the same data hand out the same ETag and a kiosk gets 304s no
+    matter which worker answers its poll.
+    """
+
+    def __init__(self, max_entries: int = 256, gzip_min_bytes: int = 1024):
+        self.max_entries = max_entries
+        self.gzip_min_bytes = gzip_min_bytes
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int, build: Callable[[], bytes]) -> CachedBody:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                return entry
+
+        body = build()
+        entry = CachedBody(version, body, hashlib.blake2b(body, digest_size=8).hexdigest())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def gzipped(self, entry: CachedBody) -> Optional[bytes]:
+        """Compressed body, built on first use; None if too small to bother."""
+        if len(entry.body) < self.gzip_min_bytes:
+            return None
+        if entry.gzipped is None:
+            entry.gzipped = gzip.compress(entry.body, compresslevel=6)
+        return entry.gzipped
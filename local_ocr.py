@@ -0,0 +1,186 @@
+# local_ocr.py
+import io
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageFont, ImageOps
+
+from ocr import OCRResult
+
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'static', 'fonts', 'Stern_FjallaOne_MONONUMBERS.ttf')
+
+# Every glyph is scaled to this height and centred in a cell this wide
+CELL_SIZE = (24, 32)
+
+
+def _normalize_glyph(glyph: Image.Image) -> Image.Image:
+    """Scale a binary glyph crop to CELL_SIZE height, keeping its aspect ratio."""
+    cell_width, cell_height = CELL_SIZE
+    width = max(1, min(cell_width, round(glyph.width * cell_height / glyph.height)))
+    scaled = glyph.resize((width, cell_height), Image.Resampling.BILINEAR)
+    cell = Image.new('L', CELL_SIZE, 0)
+    cell.paste(scaled, ((cell_width - width) // 2, 0))
+    return cell.point(lambda value: 255 if value >= 128 else 0).convert('1')
+
+
+def _ink_runs(counts: List[int], min_ink: int, max_gap: int = 0) -> List[Tuple[int, int]]:
+    """[start, end) runs of positions holding at least min_ink pixels, bridging gaps up to max_gap."""
+    runs = []
+    start = last = None
+    for position, count in enumerate(counts):
+        if count < min_ink:
+            continue
+        if start is None:
+            start = position
+        elif position - last - 1 > max_gap:
+            runs.append((start, last + 1))
+            start = position
+        last = position
+    if start is not None:
+        runs.append((start, last + 1))
+    return runs
+
+
+def _otsu(histogram: List[int], low: int) -> int:
+    """Otsu threshold over histogram[low:]; values above it are foreground."""
+    total = sum(histogram[low:])
+    weighted_total = sum(value * histogram[value] for value in range(low, 256))
+    best_threshold, best_variance = low, -1.0
+    dark = dark_weighted = 0
+    for value in range(low, 255):
+        dark += histogram[value]
+        dark_weighted += value * histogram[value]
+        if dark == 0 or dark == total:
+            continue
+        mean_dark = dark_weighted / dark
+        mean_bright = (weighted_total - dark_weighted) / (total - dark)
+        variance = dark * (total - dark) * (mean_dark - mean_bright) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = value, variance
+    return best_threshold
+
+
+def _row_counts(mask: Image.Image) -> List[int]:
+    data = mask.tobytes()
+    width = mask.width
+    return [data.count(255, row, row + width) for row in range(0, len(data), width)]
+
+
+class DigitTemplateOCR:
+    """Offline score reader for photos of lit DMD/LED/LCD score displays, using only Pillow.
+
+    The photo is binarized on its brightest class (repeated Otsu splits), so
+    bright digits are kept and the display, bezel and cabinet are dropped.
+    Dot-matrix pixels are dilated into solid strokes, and each tall row band
+    of ink is cut into glyphs that are matched against digits rendered from
+    the machine's score font. Small glyphs are taken for comma separators.
+    Confidence is the mean overlap (intersection over union) between each
+    glyph and its best template, so a blurry or unusual photo scores low
+    and falls through to OCR.space.
+    """
+
+    name = 'local'
+
+    def __init__(self, font_path: str = FONT_PATH, min_digits: int = 5, max_digits: int = 15,
+                 working_size: int = 1024, debug: bool = False):
+        self.min_digits = min_digits
+        self.max_digits = max_digits
+        self.working_size = working_size
+        self.debug = debug
+        self.templates = self._render_templates(font_path)
+
+    def _log(self, message: str) -> None:
+        if self.debug:
+            print(f"[LOCAL OCR] {message}")
+
+    @staticmethod
+    def _render_templates(font_path: str) -> Dict[str, Image.Image]:
+        font = ImageFont.truetype(font_path, 96)
+        templates = {}
+        for digit in '0123456789':
+            mask = Image.new('L', (128, 128), 0)
+            ImageDraw.Draw(mask).text((16, 0), digit, fill=255, font=font)
+            templates[digit] = _normalize_glyph(mask.crop(mask.getbbox()))
+        return templates
+
+    def _binarize(self, image_bytes: bytes) -> Image.Image:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            img.draft('L', (self.working_size, self.working_size))
+            gray = ImageOps.exif_transpose(img).convert('L')
+        gray.thumbnail((self.working_size, self.working_size))
+
+        histogram = gray.histogram()
+        total = sum(histogram)
+        # Cabinet, bezel and display background usually outnumber the digit
+        # pixels, so keep splitting off the brighter class until it is small
+        threshold = _otsu(histogram, 0)
+        for _ in range(3):
+            if sum(histogram[threshold + 1:]) <= total * 0.2:
+                break
+            threshold = _otsu(histogram, threshold + 1)
+        mask = gray.point(lambda value: 255 if value > threshold else 0)
+        # Join DMD dots into solid strokes
+        return mask.filter(ImageFilter.MaxFilter(3))
+
+    def _match(self, glyph: Image.Image) -> Tuple[str, float]:
+        cell = _normalize_glyph(glyph)
+        best_digit, best_overlap = '?', 0.0
+        for digit, template in self.templates.items():
+            union = ImageChops.logical_or(cell, template).histogram()[255]
+            if not union:
+                continue
+            overlap = ImageChops.logical_and(cell, template).histogram()[255] / union
+            if overlap > best_overlap:
+                best_digit, best_overlap = digit, overlap
+        return best_digit, best_overlap
+
+    def _read_band(self, band: Image.Image) -> Optional[Tuple[int, float]]:
+        column_counts = _row_counts(band.transpose(Image.Transpose.TRANSPOSE))
+        digits, overlaps = [], []
+        for start, end in _ink_runs(column_counts, 1):
+            glyph = band.crop((start, 0, end, band.height))
+            bbox = glyph.getbbox()
+            if bbox is None:
+                continue
+            glyph = glyph.crop(bbox)
+            if glyph.height < band.height * 0.5:
+                # Comma or decimal separator
+                continue
+            if glyph.width > glyph.height * 1.2:
+                # Touching glyphs; this band cannot be read reliably
+                return None
+            digit, overlap = self._match(glyph)
+            digits.append(digit)
+            overlaps.append(overlap)
+        if not self.min_digits <= len(digits) <= self.max_digits:
+            return None
+        return int(''.join(digits)), sum(overlaps) / len(overlaps)
+
+    def extract_text(self, image_bytes: bytes, timings: Optional[Dict[str, float]] = None) -> Optional[OCRResult]:
+        timings = timings if timings is not None else {}
+        started = time.perf_counter()
+        try:
+            mask = self._binarize(image_bytes)
+            min_ink = max(2, mask.width // 200)
+            bands = [band for band in _ink_runs(_row_counts(mask), min_ink, max_gap=1)
+                     if band[1] - band[0] >= 12]
+            # The score is the biggest text on the display
+            bands.sort(key=lambda band: band[1] - band[0], reverse=True)
+            best = None
+            for top, bottom in bands[:3]:
+                read = self._read_band(mask.crop((0, top, mask.width, bottom)))
+                if read is not None and (best is None or read[1] > best[1]):
+                    best = read
+            if best is None:
+                self._log("No score-shaped row found")
+                return None
+            score, confidence = best
+            self._log(f"Read {score} with confidence {confidence:.2f}")
+            return OCRResult(score, str(score), 'template_match', confidence, self.name)
+        except Exception as e:
+            self._log(f"Error processing image: {e}")
+            return None
+        finally:
+            timings['local'] = time.perf_counter() - started
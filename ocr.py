@@ -1,11 +1,50 @@
+import asyncio
+import json
 import os
 import requests
 from PIL import Image
 import io
-import re
-from typing import Optional, List, Tuple
-from dataclasses import dataclass
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Optional, List, Protocol, Sequence, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
+from urllib.parse import urlparse
+
+from metrics import REGISTRY, record_stage
+from score_extraction import ScoreExtractor
+
+try:
+    import httpx
+except ImportError:  # Only the async client used by asgi.py needs it
+    httpx = None
+
+OCR_ENDPOINT_SECONDS = REGISTRY.histogram(
+    'pinputt_ocr_endpoint_seconds', 'OCR.space request latency by endpoint host and outcome', ('endpoint', 'outcome'))
+OCR_RESULTS = REGISTRY.counter(
+    'pinputt_ocr_results_total', 'Score readings by the engine and extraction strategy that produced them',
+    ('engine', 'strategy'))
+
+def record_result(result: Optional['OCRResult'], timings: Dict[str, float]) -> None:
+    """Count a finished reading by engine and strategy and observe its stage timings."""
+    if result is None or result.score is None:
+        OCR_RESULTS.inc(engine='none', strategy='none')
+    else:
+        engine = 'local' if result.endpoint_used == 'local' else urlparse(result.endpoint_used).netloc
+        OCR_RESULTS.inc(engine=engine, strategy=result.strategy_used)
+    for stage, seconds in timings.items():
+        record_stage(f'ocr_{stage}', seconds)
+
+async def extract_text_async(engine: 'OCREngine', image_bytes: bytes,
+                             timings: Optional[Dict[str, float]] = None) -> Optional['OCRResult']:
+    """Await the engine's own extract_text_async if it has one, else run it in a thread."""
+    native = getattr(engine, 'extract_text_async', None)
+    if native is not None:
+        return await native(image_bytes, timings)
+    return await asyncio.to_thread(engine.extract_text, image_bytes, timings)
 
 class OCREndpoint(Enum):
     PRIMARY = "https://apipro1.ocr.space/parse/image"
@@ -17,6 +56,17 @@ class OCRConfig:
     pro_key: str
     free_key: str
     debug: bool = True
+    timeout: float = 30.0  # Seconds per OCR.space request
+    hedge: bool = True  # Race the next endpoint when one is slow
+    hedge_after: Optional[float] = None  # Seconds before hedging; None uses the endpoint's observed p95
+    breaker_threshold: int = 3  # Consecutive failures before an endpoint is skipped
+    breaker_cooldown: float = 60.0  # Seconds an endpoint is skipped for
+    pool_size: int = 10  # Pooled connections and concurrent requests
+    min_score_length: int = 5  # Digits in the shortest plausible score
+    max_score_length: int = 15  # Digits in the longest plausible score
+    response_dir: Optional[str] = None  # Save raw OCR.space responses here for the extraction benchmark
+    endpoint_urls: Optional[Sequence[str]] = None  # Primary, backup, free URLs in place of OCREndpoint, e.g. a stub server
+    async_pool_size: int = 100  # Pooled connections of the async client (asgi.py)
 
 @dataclass
 class OCRResult:
@@ -25,146 +75,505 @@ class OCRResult:
     strategy_used: str
     confidence: float
     endpoint_used: str
+    # Runner-up readings, best first: [{'score', 'confidence', 'strategy', 'line'}, ...]
+    candidates: List[Dict] = field(default_factory=list)
+
+class OCREngine(Protocol):
+    """Anything that can read a score from an uploaded image."""
+
+    def extract_text(self, image_bytes: bytes, timings: Optional[Dict[str, float]] = None) -> Optional[OCRResult]:
+        ...
+
+class TieredOCR:
+    """Tries engines in order, cheapest first.
+
+    A result is accepted once its confidence reaches confidence_threshold;
+    the last engine's answer is taken as it is.
+    """
+
+    def __init__(self, engines: Sequence[OCREngine], confidence_threshold: float, debug: bool = False):
+        self.engines = list(engines)
+        self.confidence_threshold = confidence_threshold
+        self.debug = debug
+
+    def extract_text(self, image_bytes: bytes, timings: Optional[Dict[str, float]] = None) -> Optional[OCRResult]:
+        timings = timings if timings is not None else {}
+        for engine in self.engines[:-1]:
+            result = engine.extract_text(image_bytes, timings)
+            if result is not None and result.score is not None and result.confidence >= self.confidence_threshold:
+                return result
+            if self.debug and result is not None:
+                print(f"[OCR DEBUG] {result.endpoint_used} confidence {result.confidence:.2f} too low, falling back")
+        return self.engines[-1].extract_text(image_bytes, timings)
+
+    async def extract_text_async(self, image_bytes: bytes,
+                                 timings: Optional[Dict[str, float]] = None) -> Optional[OCRResult]:
+        timings = timings if timings is not None else {}
+        for engine in self.engines[:-1]:
+            result = await extract_text_async(engine, image_bytes, timings)
+            if result is not None and result.score is not None and result.confidence >= self.confidence_threshold:
+                return result
+            if self.debug and result is not None:
+                print(f"[OCR DEBUG] {result.endpoint_used} confidence {result.confidence:.2f} too low, falling back")
+        return await extract_text_async(self.engines[-1], image_bytes, timings)
+
+class CircuitBreaker:
+    """Skips an endpoint for a cooldown after repeated consecutive failures."""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half_open' if time.monotonic() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # Half-open: let one trial request through and re-arm the cooldown
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+class LatencyTracker:
+    """Rolling window of request latencies and outcomes for one endpoint."""
+
+    def __init__(self, window: int = 100):
+        self.samples: deque = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, success: bool) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+            if success:
+                self.successes += 1
+            else:
+                self.failures += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
 
 class OCRSpaceAPI:
-    def __init__(self, config: OCRConfig):
+    """OCR.space client, meant to be shared: it owns the connection pool,
+    the per-endpoint circuit breakers and the latency statistics."""
+
+    # Hedge after this long until an endpoint has enough samples for a p95
+    DEFAULT_HEDGE_AFTER = 3.0
+    MIN_HEDGE_SAMPLES = 5
+
+    def __init__(self, config: OCRConfig, cache=None):
         self.pro_key = config.pro_key
         self.free_key = config.free_key
         self.debug = config.debug
-        self.endpoints = [
-            (OCREndpoint.PRIMARY.value, self.pro_key),
-            (OCREndpoint.BACKUP.value, self.pro_key),
-            (OCREndpoint.FREE.value, self.free_key)
-        ]
+        self.timeout = config.timeout
+        self.hedge = config.hedge
+        self.hedge_after = config.hedge_after
+        urls = config.endpoint_urls or [endpoint.value for endpoint in OCREndpoint]
+        self.endpoints = list(zip(urls, [self.pro_key, self.pro_key, self.free_key]))
+        self.breakers = {endpoint: CircuitBreaker(config.breaker_threshold, config.breaker_cooldown)
+                         for endpoint, _ in self.endpoints}
+        self.latency = {endpoint: LatencyTracker() for endpoint, _ in self.endpoints}
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=config.pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=config.pool_size, thread_name_prefix='ocr-request')
+        # httpx.AsyncClient for extract_text_async, created on the event loop that first uses it
+        self.async_pool_size = config.async_pool_size
+        self._async_client = None
+        self._async_pid = None
+        # Optional OCRResultCache; a re-uploaded photo is answered from it
+        self.cache = cache
+        self.extractor = ScoreExtractor(config.min_score_length, config.max_score_length)
+        self.response_dir = config.response_dir
+        if self.response_dir:
+            os.makedirs(self.response_dir, exist_ok=True)
+
+    def endpoint_stats(self) -> Dict[str, Dict]:
+        stats = {}
+        for endpoint, _ in self.endpoints:
+            tracker = self.latency[endpoint]
+            p50 = tracker.percentile(50)
+            p95 = tracker.percentile(95)
+            stats[endpoint] = {
+                'successes': tracker.successes,
+                'failures': tracker.failures,
+                'p50_seconds': round(p50, 3) if p50 is not None else None,
+                'p95_seconds': round(p95, 3) if p95 is not None else None,
+                'breaker': self.breakers[endpoint].state
+            }
+        return stats
 
     def _log(self, message: str) -> None:
         if self.debug:
             print(f"[OCR DEBUG] {message}")
 
-    def _compress_image(self, image_path: str, max_size_mb: float = 0.25) -> str:
-        with Image.open(image_path) as img:
-            # First resize by half
-            new_width = img.width // 2
-            new_height = img.height // 2
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            buffer = io.BytesIO()
-            quality = 95
-            while True:
-                buffer.seek(0)
-                buffer.truncate(0)
-                img.save(buffer, format='JPEG', quality=quality)
-                size_mb = buffer.tell() / (1024 * 1024)
-                
-                if size_mb <= max_size_mb:
-                    break
-                
-                quality -= 5
-                if quality < 10:
-                    raise ValueError("Cannot compress image under 0.5MB")
-            
-            compressed_path = f"{os.path.splitext(image_path)[0]}_compressed.jpg"
-            img.save(compressed_path, format='JPEG', quality=quality)
-            self._log(f"Image compressed to {size_mb:.2f}MB at quality {quality}")
-            return compressed_path
+    def _compress_image(self, image_bytes: bytes, max_size_mb: float = 0.25) -> bytes:
+        img = self._decode_half_size(image_bytes)
+        encoded, quality = self._encode_under(img, max_size_mb * 1024 * 1024)
+        self._log(f"Image compressed to {len(encoded) / (1024 * 1024):.2f}MB at quality {quality}")
+        return encoded
+
+    @staticmethod
+    def _decode_half_size(image_bytes: bytes) -> Image.Image:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            # JPEGs are scaled while decoding, so the full-resolution bitmap
+            # is never built; other formats fall back to a box reduce
+            target = (img.width // 2, img.height // 2)
+            img.draft('RGB', target)
+            if img.width >= target[0] * 2:
+                img = img.reduce(2)
+            return img.convert('RGB') if img.mode != 'RGB' else img.copy()
+
+    @staticmethod
+    def _encode_jpeg(img: Image.Image, quality: int) -> bytes:
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=quality)
+        return buffer.getvalue()
 
-    def _make_ocr_request(self, image_file, endpoint: str, api_key: str) -> Tuple[Optional[dict], Optional[str]]:
+    @classmethod
+    def _encode_under(cls, img: Image.Image, max_bytes: float) -> Tuple[bytes, int]:
+        """Encode at quality 95, or the highest multiple of 5 that fits, by binary search."""
+        encoded = cls._encode_jpeg(img, 95)
+        if len(encoded) <= max_bytes:
+            return encoded, 95
+        best = None
+        low, high = 2, 18  # quality // 5
+        while low <= high:
+            mid = (low + high) // 2
+            candidate = cls._encode_jpeg(img, mid * 5)
+            if len(candidate) <= max_bytes:
+                best = (candidate, mid * 5)
+                low = mid + 1
+            else:
+                high = mid - 1
+        if best is None:
+            raise ValueError(f"Cannot compress image under {max_bytes / (1024 * 1024):.2f}MB")
+        return best
+
+    @staticmethod
+    def _payload(api_key: str) -> Dict:
+        return {
+            'apikey': api_key,
+            'language': 'eng',
+            'OCREngine': 2,
+            'isOverlayRequired': True,
+            'detectOrientation': True,
+            'scale': True
+        }
+
+    @staticmethod
+    def _check_result(result: dict) -> Tuple[Optional[dict], Optional[str]]:
+        if result.get('OCRExitCode') in [1, 2]:
+            return result, None
+        return None, result.get('ErrorMessage', 'Unknown error')
+
+    def _make_ocr_request(self, image_bytes: bytes, endpoint: str, api_key: str) -> Tuple[Optional[dict], Optional[str]]:
         try:
-            payload = {
-                'apikey': api_key,
-                'language': 'eng',
-                'OCREngine': 2,
-                'isOverlayRequired': True,
-                'detectOrientation': True,
-                'scale': True
-            }
-            
-            files = {'image': image_file}
-            response = requests.post(endpoint, files=files, data=payload)
-            result = response.json()
+            files = {'image': ('image.jpg', image_bytes, 'image/jpeg')}
+            response = self.session.post(endpoint, files=files, data=self._payload(api_key), timeout=self.timeout)
+            return self._check_result(response.json())
             
-            if result.get('OCRExitCode') in [1, 2]:
-                return result, None
-            return None, result.get('ErrorMessage', 'Unknown error')
-            
-        except requests.RequestException as e:
+        except (requests.RequestException, ValueError) as e:
             return None, str(e)
 
-    def extract_text(self, image_path: str) -> Optional[OCRResult]:
+    def _client(self):
+        # A client made before a gunicorn fork must not be shared with the worker
+        if self._async_client is None or self._async_pid != os.getpid():
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.async_pool_size,
+                                    max_keepalive_connections=self.async_pool_size)
+            )
+            self._async_pid = os.getpid()
+        return self._async_client
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    async def _make_ocr_request_async(self, image_bytes: bytes, endpoint: str,
+                                      api_key: str) -> Tuple[Optional[dict], Optional[str]]:
         try:
-            compressed_image = self._compress_image(image_path)
-            
-            with open(compressed_image, 'rb') as image_file:
-                for endpoint, api_key in self.endpoints:
-                    self._log(f"Trying endpoint: {endpoint}")
-                    image_file.seek(0)
-                    
-                    result, error = self._make_ocr_request(image_file, endpoint, api_key)
+            files = {'image': ('image.jpg', image_bytes, 'image/jpeg')}
+            # Form values as requests encodes them, e.g. 'True'
+            data = {name: str(value) for name, value in self._payload(api_key).items()}
+            response = await self._client().post(endpoint, files=files, data=data)
+            return self._check_result(response.json())
+
+        except (httpx.HTTPError, ValueError) as e:
+            return None, str(e)
+
+    def _record_request(self, endpoint: str, elapsed: float, ok: bool) -> None:
+        self.latency[endpoint].record(elapsed, ok)
+        OCR_ENDPOINT_SECONDS.observe(elapsed, endpoint=urlparse(endpoint).netloc, outcome='ok' if ok else 'error')
+        if ok:
+            self.breakers[endpoint].record_success()
+        else:
+            self.breakers[endpoint].record_failure()
+
+    def _tracked_request(self, image_bytes: bytes, endpoint: str, api_key: str) -> Tuple[Optional[dict], Optional[str], float]:
+        started = time.perf_counter()
+        result, error = self._make_ocr_request(image_bytes, endpoint, api_key)
+        elapsed = time.perf_counter() - started
+        self._record_request(endpoint, elapsed, result is not None)
+        return result, error, elapsed
+
+    async def _tracked_request_async(self, image_bytes: bytes, endpoint: str,
+                                     api_key: str) -> Tuple[Optional[dict], Optional[str], float]:
+        started = time.perf_counter()
+        result, error = await self._make_ocr_request_async(image_bytes, endpoint, api_key)
+        elapsed = time.perf_counter() - started
+        self._record_request(endpoint, elapsed, result is not None)
+        return result, error, elapsed
+
+    def _available_endpoints(self) -> List[Tuple[str, str]]:
+        available = [(endpoint, key) for endpoint, key in self.endpoints if self.breakers[endpoint].allow()]
+        if not available:
+            # Every breaker is open; trying anyway beats failing without a request
+            self._log("All endpoints tripped, trying them all")
+            return list(self.endpoints)
+        return available
+
+    def _hedge_delay(self, endpoint: str) -> float:
+        if self.hedge_after is not None:
+            return self.hedge_after
+        tracker = self.latency[endpoint]
+        if len(tracker.samples) < self.MIN_HEDGE_SAMPLES:
+            return self.DEFAULT_HEDGE_AFTER
+        return min(tracker.percentile(95), self.timeout)
+
+    def _parse_result(self, result: dict, endpoint: str) -> Optional[OCRResult]:
+        parsed = result['ParsedResults'][0]
+        parsed_text = parsed['ParsedText']
+        self._save_response(result)
+        
+        self._log(f"Success with endpoint {endpoint}")
+        self._log(f"Raw Parsed Text:\n{parsed_text}")
+
+        candidates = self.extractor.extract(parsed_text, parsed.get('TextOverlay'))
+        if not candidates:
+            return None
+        best = candidates[0]
+        self._log(f"Score {best.score} by {best.strategy}, confidence {best.confidence}")
+        return OCRResult(best.score, parsed_text, best.strategy, best.confidence, endpoint,
+                         [candidate.to_dict() for candidate in candidates[:5]])
+
+    def _save_response(self, result: dict) -> None:
+        if not self.response_dir:
+            return
+        path = os.path.join(self.response_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.json")
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+        except OSError as e:
+            self._log(f"Could not save OCR response: {e}")
+
+    def _sequential_ocr(self, image_bytes: bytes) -> Optional[OCRResult]:
+        for endpoint, api_key in self._available_endpoints():
+            self._log(f"Trying endpoint: {endpoint}")
+            result, error, _ = self._tracked_request(image_bytes, endpoint, api_key)
+            if result:
+                ocr_result = self._parse_result(result, endpoint)
+                if ocr_result is not None:
+                    return ocr_result
+            else:
+                self._log(f"Failed with endpoint {endpoint}: {error}")
+        return None
+
+    def _hedged_ocr(self, image_bytes: bytes) -> Optional[OCRResult]:
+        """Start on the first endpoint and bring in the next one whenever the
+        newest request outlives its hedge delay or a request fails; the first
+        answer that yields a score wins."""
+        waiting = self._available_endpoints()
+        pending = {}
+        newest = None
+
+        def launch():
+            nonlocal newest
+            endpoint, api_key = waiting.pop(0)
+            self._log(f"Trying endpoint: {endpoint}")
+            pending[self._executor.submit(self._tracked_request, image_bytes, endpoint, api_key)] = endpoint
+            newest = endpoint
+
+        launch()
+        try:
+            while pending:
+                timeout = self._hedge_delay(newest) if waiting else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    self._log(f"No answer from {newest} after {timeout:.2f}s, hedging")
+                    launch()
+                    continue
+                for future in done:
+                    endpoint = pending.pop(future)
+                    result, error, _ = future.result()
                     if result:
-                        parsed_text = result['ParsedResults'][0]['ParsedText']
-                        confidence = float(result['ParsedResults'][0].get('TextOverlay', {}).get('Lines', [{}])[0].get('WordsConfidence', [0])[0])
-                        
-                        self._log(f"Success with endpoint {endpoint}")
-                        self._log(f"Raw Parsed Text:\n{parsed_text}")
-                        self._log(f"Confidence: {confidence}")
-
-                        strategies = [
-                            (self._extract_between_markers, "between_markers"),
-                            (self._extract_near_player_lines, "near_player_lines"),
-                            (self._extract_first_numeric_sequence, "first_numeric")
-                        ]
-
-                        for strategy_func, strategy_name in strategies:
-                            score = strategy_func(parsed_text)
-                            if score is not None:
-                                return OCRResult(score, parsed_text, strategy_name, confidence, endpoint)
+                        ocr_result = self._parse_result(result, endpoint)
+                        if ocr_result is not None:
+                            return ocr_result
                     else:
                         self._log(f"Failed with endpoint {endpoint}: {error}")
+                    if waiting:
+                        launch()
+            return None
+        finally:
+            # Requests already in flight cannot be aborted; their answers are
+            # still recorded for the breakers and latency stats, then dropped
+            for future in pending:
+                future.cancel()
 
-                return None
+    async def _sequential_ocr_async(self, image_bytes: bytes) -> Optional[OCRResult]:
+        for endpoint, api_key in self._available_endpoints():
+            self._log(f"Trying endpoint: {endpoint}")
+            result, error, _ = await self._tracked_request_async(image_bytes, endpoint, api_key)
+            if result:
+                ocr_result = self._parse_result(result, endpoint)
+                if ocr_result is not None:
+                    return ocr_result
+            else:
+                self._log(f"Failed with endpoint {endpoint}: {error}")
+        return None
 
-        except Exception as e:
-            self._log(f"Error processing image: {e}")
+    async def _hedged_ocr_async(self, image_bytes: bytes) -> Optional[OCRResult]:
+        """_hedged_ocr with tasks on the event loop instead of request threads."""
+        waiting = self._available_endpoints()
+        pending = {}
+        newest = None
+
+        def launch():
+            nonlocal newest
+            endpoint, api_key = waiting.pop(0)
+            self._log(f"Trying endpoint: {endpoint}")
+            pending[asyncio.ensure_future(self._tracked_request_async(image_bytes, endpoint, api_key))] = endpoint
+            newest = endpoint
+
+        launch()
+        try:
+            while pending:
+                timeout = self._hedge_delay(newest) if waiting else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self._log(f"No answer from {newest} after {timeout:.2f}s, hedging")
+                    launch()
+                    continue
+                for task in done:
+                    endpoint = pending.pop(task)
+                    result, error, _ = task.result()
+                    if result:
+                        ocr_result = self._parse_result(result, endpoint)
+                        if ocr_result is not None:
+                            return ocr_result
+                    else:
+                        self._log(f"Failed with endpoint {endpoint}: {error}")
+                    if waiting:
+                        launch()
             return None
         finally:
-            if os.path.exists(compressed_image):
-                os.remove(compressed_image)
+            # Unlike the threads, losing tasks can be cancelled, which frees
+            # their pooled connection; a cancelled request is not recorded
+            # against its endpoint's breaker
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def extract_text(self, image_bytes: bytes, timings: Optional[Dict[str, float]] = None,
+                     compressed: Optional[bytes] = None) -> Optional[OCRResult]:
+        """Run OCR on an uploaded image, optionally recording per-stage seconds into timings.
 
-    def _extract_between_markers(self, text: str) -> Optional[int]:
-        lines = text.split('\n')
+        compressed is the upload body, already shrunk the way _compress_image
+        does it, when the caller has it, e.g. from a batch's process pool.
+        """
+        timings = timings if timings is not None else {}
         try:
-            player_index = next((i for i, line in enumerate(lines) if 'PLAYER' in line.upper()), -1)
-            level_index = next((i for i, line in enumerate(lines) if 'LEVEL' in line.upper()), -1)
+            cache_key = phash = None
+            if self.cache is not None:
+                started = time.perf_counter()
+                cached, cache_key, phash = self.cache.get(image_bytes)
+                timings['cache'] = time.perf_counter() - started
+                if cached is not None:
+                    self._log("Cache hit")
+                    return cached
+
+            if compressed is None:
+                started = time.perf_counter()
+                compressed = self._compress_image(image_bytes)
+                timings['compress'] = time.perf_counter() - started
             
-            if player_index != -1 and level_index != -1 and player_index + 1 < level_index:
-                score_line = lines[player_index + 1]
-                score = re.sub(r'[^\d]', '', score_line)
-                self._log(f"Between markers strategy: {score}")
-                return int(score) if score else None
+            started = time.perf_counter()
+            try:
+                result = self._hedged_ocr(compressed) if self.hedge else self._sequential_ocr(compressed)
+            finally:
+                timings['ocr'] = time.perf_counter() - started
+            if self.cache is not None:
+                self.cache.put(cache_key, result, phash)
+            return result
+
         except Exception as e:
-            self._log(f"Between markers strategy failed: {e}")
-        return None
+            self._log(f"Error processing image: {e}")
+            return None
 
-    def _extract_near_player_lines(self, text: str) -> Optional[int]:
-        lines = text.split('\n')
-        for i, line in enumerate(lines):
-            if 'PLAYER' in line.upper():
-                for j in range(1, 3):
-                    if i + j < len(lines):
-                        score_line = lines[i + j]
-                        score = re.sub(r'[^\d]', '', score_line)
-                        if score:
-                            self._log(f"Near player lines strategy: {score}")
-                            return int(score)
-        return None
+    async def extract_text_async(self, image_bytes: bytes, timings: Optional[Dict[str, float]] = None,
+                                 compressed: Optional[bytes] = None) -> Optional[OCRResult]:
+        """extract_text for an event loop: OCR.space is awaited on the shared
+        async connection pool, and the cache lookup and compression, which
+        are CPU and disk work, run in a thread."""
+        if httpx is None:
+            return await asyncio.to_thread(self.extract_text, image_bytes, timings, compressed)
+        timings = timings if timings is not None else {}
+        try:
+            cache_key = phash = None
+            if self.cache is not None:
+                started = time.perf_counter()
+                cached, cache_key, phash = await asyncio.to_thread(self.cache.get, image_bytes)
+                timings['cache'] = time.perf_counter() - started
+                if cached is not None:
+                    self._log("Cache hit")
+                    return cached
 
-    def _extract_first_numeric_sequence(self, text: str) -> Optional[int]:
-        scores = re.findall(r'\d{5,}', text.replace('.', ''))
-        if scores:
-            score = int(scores[0])
-            self._log(f"First numeric sequence strategy: {score}")
-            return score
-        return None
+            if compressed is None:
+                started = time.perf_counter()
+                compressed = await asyncio.to_thread(self._compress_image, image_bytes)
+                timings['compress'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            try:
+                if self.hedge:
+                    result = await self._hedged_ocr_async(compressed)
+                else:
+                    result = await self._sequential_ocr_async(compressed)
+            finally:
+                timings['ocr'] = time.perf_counter() - started
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.put, cache_key, result, phash)
+            return result
+
+        except Exception as e:
+            self._log(f"Error processing image: {e}")
+            return None
@@ -0,0 +1,264 @@
+# ocr_batch.py
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from local_ocr import DigitTemplateOCR
+from ocr import OCRConfig, OCRResult, OCRSpaceAPI, record_result
+
+# Batch photos are named after the player, e.g. ABC_table2.jpg
+INITIALS_PATTERN = re.compile(r'^([A-Za-z]{1,3})(?=[_\-. ])')
+# Prefixes cameras and phones give unrenamed photos (IMG_0001.jpg,
+# DSC_1234.JPG, PXL_2025...jpg); they are never a player's initials
+CAMERA_PREFIXES = frozenset({'CAM', 'DCP', 'DJI', 'DSC', 'IMG', 'PIC', 'PXL', 'SAM', 'SDC', 'VID', 'WP'})
+
+
+def initials_from_name(name: str) -> Optional[str]:
+    match = INITIALS_PATTERN.match(os.path.basename(name))
+    if not match:
+        return None
+    initials = match.group(1).upper()
+    return None if initials in CAMERA_PREFIXES else initials
+
+
+def _has_extension(name: str, extensions: Iterable[str]) -> bool:
+    return '.' in name and name.rsplit('.', 1)[1].lower() in extensions
+
+
+def iter_directory(path: str, extensions: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+    for name in sorted(os.listdir(path)):
+        if _has_extension(name, extensions):
+            with open(os.path.join(path, name), 'rb') as f:
+                yield name, f.read()
+
+
+def iter_zip(archive: IO[bytes], extensions: Iterable[str], max_image_bytes: int,
+             max_images: Optional[int] = None, max_total_bytes: Optional[int] = None) -> Iterator[Tuple[str, bytes]]:
+    """The archive's photos, checked against the limits from its directory before any is read."""
+    with zipfile.ZipFile(archive) as zf:
+        members = []
+        for info in zf.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or name.startswith('.') or not _has_extension(name, extensions):
+                continue
+            if info.file_size > max_image_bytes:
+                raise ValueError(f'{name} is larger than {max_image_bytes} bytes uncompressed')
+            members.append((name, info))
+        if max_images is not None and len(members) > max_images:
+            raise ValueError(f'Archive has {len(members)} images, more than {max_images}')
+        total = sum(info.file_size for _, info in members)
+        if max_total_bytes is not None and total > max_total_bytes:
+            raise ValueError(f'Archive images are {total} bytes uncompressed, more than {max_total_bytes}')
+        for name, info in members:
+            yield name, zf.read(info)
+
+
+# Per-process state of the decode/compress pool
+_local_engine: Optional[DigitTemplateOCR] = None
+
+
+def _init_worker(local: bool, min_digits: int, max_digits: int) -> None:
+    global _local_engine
+    _local_engine = DigitTemplateOCR(min_digits=min_digits, max_digits=max_digits) if local else None
+
+
+def _prepare(image_bytes: bytes, confidence_threshold: float, max_size_mb: float,
+             remote: bool = True) -> Tuple[Optional[OCRResult], Optional[bytes], Dict[str, float]]:
+    """CPU-bound half of an image: the local reader, then compression if OCR.space is needed.
+
+    Without remote, the local reading is final whatever its confidence.
+    """
+    timings = {}
+    if _local_engine is not None:
+        result = _local_engine.extract_text(image_bytes, timings)
+        if result is not None and (result.confidence >= confidence_threshold or not remote):
+            return result, None, timings
+    if not remote:
+        return None, None, timings
+    started = time.perf_counter()
+    img = OCRSpaceAPI._decode_half_size(image_bytes)
+    compressed, _ = OCRSpaceAPI._encode_under(img, max_size_mb * 1024 * 1024)
+    timings['compress'] = time.perf_counter() - started
+    return None, compressed, timings
+
+
+class BatchOCR:
+    """Reads a batch of score photos, yielding each result as soon as it is ready.
+
+    Decoding, the local reader and compression run on a process pool; the
+    remaining OCR.space calls run on a bounded thread pool sharing ocr_api's
+    connection pool, circuit breakers and result cache. With no ocr_api
+    (no OCR.space key) the local reader's answer is taken as it is.
+    """
+
+    def __init__(self, ocr_api: Optional[OCRSpaceAPI], processes: Optional[int] = None, threads: int = 4,
+                 local: bool = True, confidence_threshold: float = 0.8,
+                 min_digits: int = 5, max_digits: int = 15, max_size_mb: float = 0.25):
+        self.ocr_api = ocr_api
+        self.processes = processes or os.cpu_count() or 1
+        self.threads = threads
+        self.local = local
+        self.confidence_threshold = confidence_threshold
+        self.min_digits = min_digits
+        self.max_digits = max_digits
+        self.max_size_mb = max_size_mb
+
+    def run(self, images: Iterable[Tuple[str, bytes]]) -> Iterator[Dict]:
+        images = iter(images)
+        max_in_flight = (self.processes + self.threads) * 2
+        # spawn, not fork: the web process has live threads holding locks
+        pool = ProcessPoolExecutor(
+            self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.local, self.min_digits, self.max_digits)
+        )
+        with pool, ThreadPoolExecutor(self.threads, thread_name_prefix='ocr-batch') as threads:
+            pending = {}
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_in_flight:
+                    try:
+                        name, image_bytes = next(images)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    future = pool.submit(_prepare, image_bytes, self.confidence_threshold, self.max_size_mb,
+                                         self.ocr_api is not None)
+                    pending[future] = (name, image_bytes, None)
+                if not pending:
+                    return
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, image_bytes, timings = pending.pop(future)
+                    try:
+                        if timings is None:
+                            result, compressed, timings = future.result()
+                            if result is None and self.ocr_api is not None:
+                                remote = threads.submit(self.ocr_api.extract_text, image_bytes, timings, compressed)
+                                pending[remote] = (name, image_bytes, timings)
+                                continue
+                        else:
+                            result = future.result()
+                    except Exception as e:
+                        yield {'name': name, 'initials': initials_from_name(name), 'error': str(e)}
+                        continue
+                    yield self._row(name, result, timings)
+
+    @staticmethod
+    def _row(name: str, result: Optional[OCRResult], timings: Dict[str, float]) -> Dict:
+        record_result(result, timings)
+        row = {
+            'name': name,
+            'initials': initials_from_name(name),
+            'timings': {stage: round(seconds, 3) for stage, seconds in timings.items()}
+        }
+        if result is None or result.score is None:
+            row['error'] = 'Could not detect score'
+        else:
+            row.update({
+                'score': result.score,
+                'confidence': result.confidence,
+                'strategy': result.strategy_used,
+                'endpoint_used': result.endpoint_used
+            })
+        return row
+
+
+def commit_rows(db, rows: List[Dict], min_confidence: float) -> Dict:
+    """Add every confident, named result with one add_attempts call."""
+    accepted = [row for row in rows
+                if row.get('score') is not None and row['initials'] and row['confidence'] >= min_confidence]
+    if accepted:
+        db.add_attempts([(row['initials'], row['score']) for row in accepted])
+    committed = {id(row) for row in accepted}
+    return {
+        'committed': len(accepted),
+        'not_committed': [row['name'] for row in rows if id(row) not in committed]
+    }
+
+
+def stream_ndjson(batch: BatchOCR, images: Iterable[Tuple[str, bytes]],
+                  db=None, min_confidence: float = 0.8) -> Iterator[str]:
+    """NDJSON lines for each result as it finishes, then a summary line.
+
+    With db given, confident results are committed in bulk once every image
+    has been read, so the summary line reports what was committed.
+    """
+    rows = []
+    for row in batch.run(images):
+        rows.append(row)
+        yield json.dumps(row) + '\n'
+    summary = {'summary': True, 'images': len(rows),
+               'read': sum(1 for row in rows if row.get('score') is not None)}
+    if db is not None:
+        summary.update(commit_rows(db, rows, min_confidence))
+    yield json.dumps(summary) + '\n'
+
+
+if __name__ == '__main__':
+    from config import Config
+
+    parser = argparse.ArgumentParser(description='Read a folder or zip of score photos and print NDJSON results.')
+    parser.add_argument('source', help='Directory or .zip of photos named <INITIALS>_*.jpg (not IMG_*, DSC_*, ...)')
+    parser.add_argument('--commit', action='store_true', help='Add confident results to the current scores')
+    parser.add_argument('--min-confidence', type=float, default=Config.OCR_CONFIDENCE_THRESHOLD)
+    parser.add_argument('--processes', type=int, default=Config.OCR_BATCH_PROCESSES)
+    parser.add_argument('--threads', type=int, default=Config.OCR_WORKERS)
+    args = parser.parse_args()
+
+    ocr_api = OCRSpaceAPI(OCRConfig(
+        pro_key=Config.OCR_PRO_KEY,
+        free_key=Config.OCR_FREE_KEY,
+        debug=False,
+        timeout=Config.OCR_TIMEOUT,
+        hedge=Config.OCR_HEDGE,
+        hedge_after=Config.OCR_HEDGE_AFTER,
+        pool_size=args.threads * 3,
+        min_score_length=Config.OCR_MIN_SCORE_LENGTH,
+        max_score_length=Config.OCR_MAX_SCORE_LENGTH,
+        endpoint_urls=Config.OCR_ENDPOINT_URLS
+    ))
+    db = None
+    if args.commit:
+        if Config.DB_BACKEND == 'sqlite':
+            from sqlite_db import SQLitePinPuttDB
+            db = SQLitePinPuttDB(Config.DB_SQLITE_FILE or os.path.join(Config.DATA_DIR, 'scores.db'))
+        else:
+            from database import PinPuttDB
+            db = PinPuttDB(Config.DATA_DIR, journal=Config.DB_JOURNAL,
+                           compact_bytes=Config.DB_JOURNAL_COMPACT_BYTES)
+
+    if os.path.isdir(args.source):
+        images = iter_directory(args.source, Config.ALLOWED_EXTENSIONS)
+        archive = None
+    else:
+        archive = open(args.source, 'rb')
+        images = iter_zip(archive, Config.ALLOWED_EXTENSIONS, Config.MAX_CONTENT_LENGTH,
+                          Config.OCR_BATCH_MAX_IMAGES, Config.OCR_BATCH_MAX_BYTES)
+    if not (Config.OCR_PRO_KEY or Config.OCR_LOCAL):
+        sys.exit('Set OCR_PRO_KEY, or OCR_LOCAL to read scores offline')
+    batch = BatchOCR(
+        ocr_api if Config.OCR_PRO_KEY else None,
+        processes=args.processes,
+        threads=args.threads,
+        local=Config.OCR_LOCAL,
+        confidence_threshold=Config.OCR_CONFIDENCE_THRESHOLD,
+        min_digits=Config.OCR_MIN_SCORE_LENGTH,
+        max_digits=Config.OCR_MAX_SCORE_LENGTH
+    )
+    try:
+        for line in stream_ndjson(batch, images, db, args.min_confidence):
+            sys.stdout.write(line)
+            sys.stdout.flush()
+    finally:
+        if archive is not None:
+            archive.close()
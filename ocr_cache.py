@@ -0,0 +1,196 @@
+# ocr_cache.py
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from ocr import OCRResult
+
+
+def content_hash(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def perceptual_hash(image_bytes: bytes) -> Optional[int]:
+    """64-bit difference hash; survives re-encoding and mild rescaling."""
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            # JPEG can decode straight to a tiny grayscale image
+            img.draft('L', (64, 64))
+            pixels = list(img.convert('L').resize((9, 8), Image.Resampling.BILINEAR).getdata())
+    except Exception:
+        return None
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+class OCRResultCache:
+    """OCR results keyed by image content, so a re-uploaded photo skips OCR.
+
+    Lookups try an exact SHA-256 match in memory, then on disk. With
+    perceptual on, a memory entry within max_distance bits of the photo's
+    difference hash is a candidate for the same photo re-encoded by a
+    different phone or browser. The hash cannot tell scores apart on a fixed
+    camera, so a candidate is only returned when reader (e.g. the local
+    digit reader) reads the same score from the new photo; the photo's exact
+    hash is then linked to the entry. Only results with a score are cached;
+    a failed read may have been a transient OCR outage.
+    """
+
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[str] = None,
+                 disk_ttl: float = 24 * 3600, disk_max_bytes: int = 20 * 1024 * 1024,
+                 perceptual: bool = False, max_distance: int = 4, reader=None):
+        if perceptual and reader is None:
+            raise ValueError('Perceptual matching needs a reader to confirm the score')
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_ttl = disk_ttl
+        self.disk_max_bytes = disk_max_bytes
+        self.perceptual = perceptual
+        self.max_distance = max_distance
+        self.reader = reader
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        self._entries: "OrderedDict[str, Tuple[OCRResult, Optional[int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'perceptual_hits': 0,
+                          'perceptual_rejected': 0, 'misses': 0, 'stores': 0}
+
+    def get(self, image_bytes: bytes) -> Tuple[Optional[OCRResult], str, Optional[int]]:
+        """Return (result, key, perceptual hash); pass key and hash back to put() on a miss."""
+        key = content_hash(image_bytes)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters['memory_hits'] += 1
+                return entry[0], key, entry[1]
+
+        entry = self._load_disk(key)
+        if entry is not None:
+            self._remember(key, *entry)
+            with self._lock:
+                self._counters['disk_hits'] += 1
+            return entry[0], key, entry[1]
+
+        phash = perceptual_hash(image_bytes) if self.perceptual else None
+        if phash is not None:
+            result = self._confirmed_match(image_bytes, phash)
+            if result is not None:
+                # Later uploads of this exact file hit without the reader
+                self._remember(key, result, phash)
+                self._store_disk(key, result, phash)
+                with self._lock:
+                    self._counters['perceptual_hits'] += 1
+                return result, key, phash
+
+        with self._lock:
+            self._counters['misses'] += 1
+        return None, key, phash
+
+    def _confirmed_match(self, image_bytes: bytes, phash: int) -> Optional[OCRResult]:
+        with self._lock:
+            candidates = [result for result, other_phash in reversed(self._entries.values())
+                          if other_phash is not None and bin(phash ^ other_phash).count('1') <= self.max_distance]
+        if not candidates:
+            return None
+        reading = self.reader.extract_text(image_bytes)
+        score = reading.score if reading is not None else None
+        for result in candidates:
+            if score is not None and result.score == score:
+                return result
+        with self._lock:
+            self._counters['perceptual_rejected'] += 1
+        return None
+
+    def put(self, key: str, result: OCRResult, phash: Optional[int] = None) -> None:
+        if result is None or result.score is None:
+            return
+        self._remember(key, result, phash)
+        with self._lock:
+            self._counters['stores'] += 1
+        self._store_disk(key, result, phash)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        lookups = sum(counters[name] for name in ('memory_hits', 'disk_hits', 'perceptual_hits', 'misses'))
+        hits = lookups - counters['misses']
+        counters.update({
+            'entries': entries,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0
+        })
+        return counters
+
+    def _remember(self, key: str, result: OCRResult, phash: Optional[int]) -> None:
+        with self._lock:
+            self._entries[key] = (result, phash)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f'{key}.json')
+
+    def _load_disk(self, key: str) -> Optional[Tuple[OCRResult, Optional[int]]]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.disk_ttl:
+                os.remove(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return OCRResult(**data['result']), data.get('phash')
+
+    def _store_disk(self, key: str, result: OCRResult, phash: Optional[int]) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'result': asdict(result), 'phash': phash}, f)
+            os.replace(tmp_path, path)
+            self._enforce_disk_limits()
+        except OSError:
+            # The disk tier is best effort
+            pass
+
+    def _enforce_disk_limits(self) -> None:
+        now = time.time()
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if now - st.st_mtime > self.disk_ttl:
+                os.remove(path)
+            else:
+                files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            os.remove(path)
+            total -= size
@@ -0,0 +1,257 @@
+# ocr_jobs.py
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class QueueFull(Exception):
+    """Raised by OCRJobQueue.submit when no queue slot is free."""
+
+
+@dataclass
+class OCRJob:
+    id: str
+    image: bytes = field(repr=False)  # The upload, held only until the job runs
+    status: str = 'queued'  # queued -> running -> done | failed
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    # Seconds spent per stage, e.g. {'read': .., 'wait': .., 'compress': .., 'ocr': ..}
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data.pop('image')
+        return data
+
+
+class OCRJobQueue:
+    """Bounded queue of score-image OCR jobs drained by a pool of worker threads.
+
+    process(job) does the work and returns the result dict, or None when no
+    score was found. Each job's state is also written to results_dir when it
+    is queued, starts and finishes, so a status poll answered by a different
+    gunicorn worker still finds it.
+
+    Under asgi.py, run_on_loop swaps the threads for tasks on the event loop,
+    so a job waiting on OCR.space holds no thread.
+    """
+
+    def __init__(self, process: Callable[[OCRJob], Optional[Dict]], results_dir: str,
+                 workers: int = 4, max_queue: int = 32, result_ttl: float = 600.0):
+        self.process = process
+        self.results_dir = results_dir
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        os.makedirs(results_dir, exist_ok=True)
+        self._queue: "queue.Queue[OCRJob]" = queue.Queue(maxsize=max_queue)
+        self._jobs: Dict[str, OCRJob] = {}
+        self._lock = threading.Lock()
+        self._busy = 0
+        # Recent finished jobs' timings for the queue stats
+        self._recent: deque = deque(maxlen=200)
+        self._threads = []
+        self._pid = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._process_async: Optional[Callable[[OCRJob], Awaitable[Optional[Dict]]]] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: set = set()
+
+    def new_job_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def run_on_loop(self, loop: asyncio.AbstractEventLoop,
+                    process: Callable[[OCRJob], Awaitable[Optional[Dict]]], workers: int) -> None:
+        """Run jobs as tasks on loop, at most workers at once, instead of in worker threads.
+
+        process is the coroutine counterpart of the process callable.
+        """
+        with self._lock:
+            self._loop = loop
+            self._process_async = process
+            self.workers = workers
+            self._slots = asyncio.Semaphore(workers)
+
+    def submit(self, job_id: str, image: bytes, timings: Optional[Dict[str, float]] = None) -> OCRJob:
+        self._ensure_workers()
+        job = OCRJob(job_id, image, timings=dict(timings or {}))
+        with self._lock:
+            self._jobs[job.id] = job
+        # Written before a worker can pick the job up and record it as running
+        self._store_result(job)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            self._remove_result(job.id)
+            raise QueueFull(f'OCR queue is full ({self.max_queue} jobs waiting)')
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._spawn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                data = job.to_dict()
+                if job.status == 'queued':
+                    data['queue_position'] = self._queue_position(job)
+                return data
+        return self._load_result(job_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            recent = list(self._recent)
+            queued = [job for job in self._jobs.values() if job.status == 'queued']
+            busy = self._busy
+        now = time.time()
+        stages: Dict[str, list] = {}
+        for timings in recent:
+            for stage, seconds in timings.items():
+                stages.setdefault(stage, []).append(seconds)
+        return {
+            'queue_depth': len(queued),
+            'queue_capacity': self.max_queue,
+            'workers': self.workers,
+            'workers_busy': busy,
+            'oldest_wait_seconds': round(max((now - job.submitted_at for job in queued), default=0.0), 3),
+            'stage_seconds': {
+                stage: {
+                    'avg': round(sum(values) / len(values), 3),
+                    'max': round(max(values), 3),
+                    'count': len(values)
+                } for stage, values in stages.items()
+            }
+        }
+
+    def _queue_position(self, job: OCRJob) -> int:
+        return sum(1 for other in self._jobs.values()
+                   if other.status == 'queued' and other.submitted_at < job.submitted_at) + 1
+
+    def _ensure_workers(self) -> None:
+        # Threads started before a gunicorn fork do not exist in the worker
+        with self._lock:
+            if self._loop is not None or self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._work, name=f'ocr-worker-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def _start(self, job: OCRJob) -> None:
+        with self._lock:
+            self._busy += 1
+            job.status = 'running'
+            job.started_at = time.time()
+            job.timings['wait'] = job.started_at - job.submitted_at
+
+    def _finish(self, job: OCRJob, result: Optional[Dict], error: Optional[Exception]) -> None:
+        with self._lock:
+            if error is not None:
+                job.status = 'failed'
+                job.error = str(error)
+            elif result is None:
+                job.status = 'failed'
+                job.error = 'Could not detect score'
+            else:
+                job.status = 'done'
+                job.result = result
+            self._busy -= 1
+            job.image = b''
+            job.finished_at = time.time()
+            self._recent.append(dict(job.timings))
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            self._start(job)
+            self._store_result(job)
+            result = error = None
+            try:
+                result = self.process(job)
+            except Exception as e:
+                error = e
+            finally:
+                self._finish(job, result, error)
+                self._store_result(job)
+                self._prune()
+                self._queue.task_done()
+
+    def _spawn(self) -> None:
+        task = self._loop.create_task(self._work_async())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _work_async(self) -> None:
+        # One task per submitted job; the semaphore stands in for the worker count
+        async with self._slots:
+            job = self._queue.get_nowait()
+            self._start(job)
+            await asyncio.to_thread(self._store_result, job)
+            result = error = None
+            try:
+                result = await self._process_async(job)
+            except Exception as e:
+                error = e
+            finally:
+                self._finish(job, result, error)
+                await asyncio.to_thread(self._store_result, job)
+                await asyncio.to_thread(self._prune)
+                self._queue.task_done()
+
+    def _result_path(self, job_id: str) -> str:
+        return os.path.join(self.results_dir, f'{job_id}.json')
+
+    def _store_result(self, job: OCRJob) -> None:
+        with self._lock:
+            data = job.to_dict()
+        path = self._result_path(job.id)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _remove_result(self, job_id: str) -> None:
+        try:
+            os.remove(self._result_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def _load_result(self, job_id: str) -> Optional[Dict]:
+        # Job ids are uuid4 hex; anything else never names a result file
+        if len(job_id) != 32 or not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        try:
+            with open(self._result_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        for name in os.listdir(self.results_dir):
+            path = os.path.join(self.results_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
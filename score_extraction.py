@@ -0,0 +1,140 @@
+# score_extraction.py
+import re
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+# A score token: a digit run, optionally grouped by thousands separators
+SCORE_TOKEN = re.compile(r'\d+(?:[,.]\d{3})+|\d+')
+NON_DIGIT = re.compile(r'\D')
+LETTER = re.compile(r'[^\W\d_]')
+
+# Signal weights; a candidate's confidence is their sum, capped at 1
+BASE_WEIGHT = 0.2
+BETWEEN_MARKERS_WEIGHT = 0.45
+NEAR_PLAYER_WEIGHT = {1: 0.35, 2: 0.25}
+PLAYER_LINE_WEIGHT = 0.15  # "PLAYER 1 12,345,670" on one line
+NUMERIC_LINE_WEIGHT = 0.1
+HEIGHT_WEIGHT = 0.3
+
+
+@dataclass
+class ScoreCandidate:
+    score: int
+    confidence: float
+    strategy: str  # the strongest signal behind it
+    line: int
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _digits(text: str) -> str:
+    return NON_DIGIT.sub('', text)
+
+
+class ScoreExtractor:
+    """Ranks every number in an OCR.space response as the player's score.
+
+    One pass over the parsed text lines finds the PLAYER and LEVEL marker
+    lines and every score-shaped token, the PLAYER line's own included;
+    numbers outside the min/max digit
+    bounds are dropped. Only if some remain is the word geometry in
+    TextOverlay walked, adding each one's rendered height, since the score
+    is the biggest text on the display.
+    """
+
+    def __init__(self, min_length: int = 5, max_length: int = 15):
+        self.min_length = min_length
+        self.max_length = max_length
+
+    def _heights(self, overlay: Optional[Dict], wanted) -> Tuple[Dict[str, float], float]:
+        """Tallest rendered height of each wanted number in the overlay, and of any number."""
+        heights: Dict[str, float] = {}
+        tallest = 0.0
+        for line in (overlay or {}).get('Lines') or ():
+            line_digits = []
+            line_height = 0.0
+            for word in line.get('Words') or ():
+                digits = word.get('WordText', '')
+                if not digits.isdigit():
+                    # Most words are labels; skip the regex for them
+                    if digits.isalpha():
+                        continue
+                    digits = _digits(digits)
+                    if not digits:
+                        continue
+                height = float(word.get('Height') or 0)
+                if height > tallest:
+                    tallest = height
+                if height > line_height:
+                    line_height = height
+                if digits in wanted and height > heights.get(digits, 0.0):
+                    heights[digits] = height
+                line_digits.append(digits)
+            if len(line_digits) > 1:
+                # "1 234 567" comes back as three words
+                joined = ''.join(line_digits)
+                if joined in wanted and line_height > heights.get(joined, 0.0):
+                    heights[joined] = line_height
+        return heights, tallest
+
+    def extract(self, text: str, overlay: Optional[Dict] = None) -> List[ScoreCandidate]:
+        min_length, max_length = self.min_length, self.max_length
+        # (digits, line index, lines since the last PLAYER line, line text),
+        # for numbers within the digit bounds
+        found = []
+        last_player = last_level = None
+        for index, line in enumerate(text.split('\n')):
+            upper = line.upper()
+            if 'PLAYER' in upper:
+                last_player = index
+            elif 'LEVEL' in upper:
+                last_level = index
+            tokens = SCORE_TOKEN.findall(line)
+            if not tokens:
+                continue
+            since_player = index - last_player if last_player is not None else None
+            for token in tokens:
+                digits = token.replace(',', '').replace('.', '') if len(token) > 3 else token
+                if min_length <= len(digits) <= max_length:
+                    found.append((digits, index, since_player, line))
+            if since_player in NEAR_PLAYER_WEIGHT and len(tokens) > 1:
+                # Spaced-out digits right under PLAYER are one number
+                digits = _digits(line)
+                if min_length <= len(digits) <= max_length:
+                    found.append((digits, index, since_player, line))
+        if not found:
+            return []
+
+        # The overlay is only walked once the text has numbers to rank
+        heights, tallest = self._heights(overlay, {digits for digits, _, _, _ in found})
+        # score -> (confidence, strategy, line)
+        best: Dict[int, Tuple[float, str, int]] = {}
+        for digits, index, since_player, line in found:
+            confidence = BASE_WEIGHT
+            strategy = 'first_numeric'
+            if since_player == 1 and last_level is not None and last_level > index:
+                confidence += BETWEEN_MARKERS_WEIGHT
+                strategy = 'between_markers'
+            elif since_player in NEAR_PLAYER_WEIGHT:
+                confidence += NEAR_PLAYER_WEIGHT[since_player]
+                strategy = 'near_player_lines'
+            elif since_player == 0:
+                confidence += PLAYER_LINE_WEIGHT
+                strategy = 'player_line'
+            if LETTER.search(line) is None:
+                confidence += NUMERIC_LINE_WEIGHT
+            height = heights.get(digits)
+            if height is not None:
+                confidence += HEIGHT_WEIGHT * height / tallest
+                if strategy == 'first_numeric' and height == tallest:
+                    strategy = 'largest_text'
+            score = int(digits)
+            confidence = round(min(confidence, 1.0), 3)
+            current = best.get(score)
+            if current is None or confidence > current[0]:
+                best[score] = (confidence, strategy, index)
+
+        # Ties go to the earliest line, like the old first-match strategies
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[1][2]))
+        return [ScoreCandidate(score, confidence, strategy, index) for score, (confidence, strategy, index) in ranked]
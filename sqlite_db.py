@@ -0,0 +1,576 @@
+# sqlite_db.py
+import glob
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from attempt_store import check_int64, iter_attempts
+from database import DISTANCE_PERCENTILES, format_score_bands, load_snapshot, score_band_bounds
+from metrics import record_stage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seasons (
+    id INTEGER PRIMARY KEY,
+    opened_at TEXT NOT NULL,
+    closed_at TEXT,
+    archive_name TEXT
+);
+CREATE TABLE IF NOT EXISTS targets (
+    id INTEGER PRIMARY KEY,
+    season_id INTEGER NOT NULL REFERENCES seasons(id),
+    score INTEGER NOT NULL,
+    set_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    initials TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    season_id INTEGER NOT NULL REFERENCES seasons(id),
+    player_id INTEGER NOT NULL REFERENCES players(id),
+    target_id INTEGER NOT NULL REFERENCES targets(id),
+    score INTEGER NOT NULL,
+    distance INTEGER NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player_bests (
+    season_id INTEGER NOT NULL REFERENCES seasons(id),
+    player_id INTEGER NOT NULL REFERENCES players(id),
+    attempt_id INTEGER NOT NULL REFERENCES attempts(id),
+    distance INTEGER NOT NULL,
+    PRIMARY KEY (season_id, player_id)
+);
+CREATE TABLE IF NOT EXISTS player_totals (
+    season_id INTEGER NOT NULL REFERENCES seasons(id),
+    player_id INTEGER NOT NULL REFERENCES players(id),
+    attempts INTEGER NOT NULL,
+    total_score INTEGER NOT NULL,
+    best_score INTEGER NOT NULL,
+    PRIMARY KEY (season_id, player_id)
+);
+CREATE TABLE IF NOT EXISTS season_totals (
+    season_id INTEGER PRIMARY KEY REFERENCES seasons(id),
+    attempts INTEGER NOT NULL,
+    total_score INTEGER NOT NULL,
+    min_score INTEGER NOT NULL,
+    max_score INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_attempts_player_distance
+    ON attempts(season_id, player_id, distance, id);
+CREATE INDEX IF NOT EXISTS idx_attempts_player_id ON attempts(season_id, player_id, id);
+CREATE INDEX IF NOT EXISTS idx_attempts_score ON attempts(season_id, score);
+CREATE INDEX IF NOT EXISTS idx_attempts_distance ON attempts(season_id, distance);
+CREATE INDEX IF NOT EXISTS idx_targets_season ON targets(season_id, id);
+CREATE INDEX IF NOT EXISTS idx_player_bests_distance ON player_bests(season_id, distance, player_id);
+"""
+
+# player_bests holds each player's best attempt, maintained by add_attempt,
+# so the leaderboard is a walk of idx_player_bests_distance
+LEADERBOARD_SQL = """
+SELECT p.initials, a.score, a.distance, a.timestamp
+FROM player_bests b
+JOIN attempts a ON a.id = b.attempt_id
+JOIN players p ON p.id = b.player_id
+WHERE b.season_id = :season
+ORDER BY b.distance, b.player_id
+LIMIT :limit OFFSET :offset
+"""
+
+TOP_PLAYERS_SQL = """
+SELECT p.initials, a.score, a.distance, a.timestamp, t.score AS target, s.attempts AS total_attempts
+FROM player_bests b
+JOIN attempts a ON a.id = b.attempt_id
+JOIN players p ON p.id = b.player_id
+JOIN targets t ON t.id = a.target_id
+JOIN player_totals s ON s.season_id = b.season_id AND s.player_id = b.player_id
+WHERE b.season_id = :season
+ORDER BY b.distance, b.player_id
+"""
+
+# Rows kept in the changes table for other processes to catch up from
+CHANGE_LOG_SIZE = 1000
+
+# Lowest distance, earliest on ties, per player
+REBUILD_BESTS_SQL = """
+INSERT OR REPLACE INTO player_bests (season_id, player_id, attempt_id, distance)
+SELECT season_id, player_id, id, distance FROM (
+    SELECT season_id, player_id, id, distance,
+           ROW_NUMBER() OVER (PARTITION BY player_id ORDER BY distance, id) AS rn
+    FROM attempts WHERE season_id = ?
+) WHERE rn = 1
+"""
+
+# player_totals holds each player's attempt count, score total and best
+# score, also maintained by add_attempt, so player stats never aggregate
+REBUILD_TOTALS_SQL = """
+INSERT OR REPLACE INTO player_totals (season_id, player_id, attempts, total_score, best_score)
+SELECT season_id, player_id, COUNT(*), SUM(score), MAX(score)
+FROM attempts WHERE season_id = ?
+GROUP BY player_id
+"""
+
+# season_totals holds the season's attempt count, score total and score
+# range, maintained by add_attempt. Score bands move with the range, so
+# their counts are range counts on idx_attempts_score, and distance
+# percentiles an offset into idx_attempts_distance; neither leaves SQLite.
+REBUILD_SEASON_TOTALS_SQL = """
+INSERT OR REPLACE INTO season_totals (season_id, attempts, total_score, min_score, max_score)
+SELECT season_id, COUNT(*), SUM(score), MIN(score), MAX(score)
+FROM attempts WHERE season_id = ?
+GROUP BY season_id
+"""
+
+# A page of a player's attempts, newest first; the attempt id is the cursor
+PLAYER_ATTEMPTS_SQL = """
+SELECT a.id, a.score, a.timestamp, a.distance, t.score AS target
+FROM attempts a
+JOIN targets t ON t.id = a.target_id
+WHERE a.season_id = :season AND a.player_id = :player AND a.id < :before
+ORDER BY a.id DESC
+LIMIT :limit
+"""
+
+class SQLitePinPuttDB:
+    """PinPuttDB backed by SQLite (WAL mode) instead of scores.json.
+
+    A season is the span between two reset_scores calls; closed seasons stay
+    in the database instead of being written out to closedscores_*.json.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self.data_dir = os.path.dirname(os.path.abspath(db_file))
+        self._local = threading.local()
+        self._listeners: List[Callable[[str, Dict], None]] = []
+        self._change_lock = threading.Lock()
+        self._seen_change_id = 0
+        self.init_db()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, isolation_level=None, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _write(self):
+        conn = self._conn()
+        return _Transaction(conn)
+
+    def init_db(self) -> None:
+        os.makedirs(self.data_dir, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        with self._write() as conn:
+            if conn.execute('SELECT 1 FROM seasons WHERE closed_at IS NULL').fetchone() is None:
+                conn.execute('INSERT INTO seasons (opened_at) VALUES (?)', (datetime.now().isoformat(),))
+            # Databases created before player_bests existed
+            if conn.execute('SELECT 1 FROM player_bests LIMIT 1').fetchone() is None:
+                for season in conn.execute('SELECT DISTINCT season_id FROM attempts').fetchall():
+                    conn.execute(REBUILD_BESTS_SQL, (season[0],))
+            # Databases created before player_totals existed
+            if conn.execute('SELECT 1 FROM player_totals LIMIT 1').fetchone() is None:
+                for season in conn.execute('SELECT DISTINCT season_id FROM attempts').fetchall():
+                    conn.execute(REBUILD_TOTALS_SQL, (season[0],))
+            # Databases created before season_totals existed
+            if conn.execute('SELECT 1 FROM season_totals LIMIT 1').fetchone() is None:
+                for season in conn.execute('SELECT DISTINCT season_id FROM attempts').fetchall():
+                    conn.execute(REBUILD_SEASON_TOTALS_SQL, (season[0],))
+            self._seen_change_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM changes').fetchone()[0]
+
+    def add_listener(self, listener: Callable[[str, Dict], None]) -> None:
+        """Call listener(kind, payload) after every change; see PinPuttDB.add_listener."""
+        self._listeners.append(listener)
+
+    def _notify(self, kind: str, payload: Dict) -> None:
+        for listener in self._listeners:
+            listener(kind, payload)
+
+    @property
+    def version(self) -> int:
+        """Id of the latest change; shared by every process using the database."""
+        return self._conn().execute('SELECT COALESCE(MAX(id), 0) FROM changes').fetchone()[0]
+
+    def _record_change(self, conn: sqlite3.Connection, kind: str, payload: Dict) -> None:
+        change_id = conn.execute(
+            'INSERT INTO changes (pid, kind, payload) VALUES (?, ?, ?)',
+            (os.getpid(), kind, json.dumps(payload))
+        ).lastrowid
+        conn.execute('DELETE FROM changes WHERE id <= ?', (change_id - CHANGE_LOG_SIZE,))
+
+    def poll_changes(self) -> None:
+        """Notify listeners of changes committed by other processes since the last poll."""
+        with self._change_lock:
+            rows = self._conn().execute(
+                'SELECT id, pid, kind, payload FROM changes WHERE id > ? ORDER BY id',
+                (self._seen_change_id,)
+            ).fetchall()
+            if not rows:
+                return
+            if rows[0]['id'] > self._seen_change_id + 1:
+                # Fell behind the pruned change log
+                self._notify('reload', {})
+            else:
+                for row in rows:
+                    if row['pid'] != os.getpid():
+                        self._notify(row['kind'], json.loads(row['payload']))
+            self._seen_change_id = rows[-1]['id']
+
+    def _season_id(self, conn=None) -> int:
+        conn = conn or self._conn()
+        row = conn.execute('SELECT id FROM seasons WHERE closed_at IS NULL ORDER BY id DESC LIMIT 1').fetchone()
+        return row['id']
+
+    def _current_target_row(self, conn, season_id: int) -> Optional[sqlite3.Row]:
+        return conn.execute(
+            'SELECT id, score FROM targets WHERE season_id = ? ORDER BY id DESC LIMIT 1',
+            (season_id,)
+        ).fetchone()
+
+    def set_target(self, target_score: int) -> None:
+        check_int64('target', target_score)
+        with self._write() as conn:
+            conn.execute(
+                'INSERT INTO targets (season_id, score, set_at) VALUES (?, ?, ?)',
+                (self._season_id(conn), target_score, datetime.now().isoformat())
+            )
+            self._record_change(conn, 'target', {'target': target_score})
+        self._notify('target', {'target': target_score})
+
+    def add_attempt(self, initials: str, score: int) -> Dict:
+        return self.add_attempts([(initials, score)])[0]
+
+    def add_attempts(self, scores: List[Tuple[str, int]]) -> List[Dict]:
+        """Record several (initials, score) attempts in one transaction."""
+        timestamp = datetime.now().isoformat()
+        changes = []
+        with self._write() as conn:
+            season_id = self._season_id(conn)
+            target_row = self._current_target_row(conn, season_id)
+            if target_row is None:
+                raise ValueError("No target score has been set")
+
+            target = target_row['score']
+            for initials, score in scores:
+                distance = abs(score - target)
+                check_int64('score', score)
+                check_int64('distance', distance)
+                conn.execute('INSERT OR IGNORE INTO players (initials) VALUES (?)', (initials,))
+                player_id = conn.execute('SELECT id FROM players WHERE initials = ?', (initials,)).fetchone()['id']
+                attempt_id = conn.execute(
+                    'INSERT INTO attempts (season_id, player_id, target_id, score, distance, timestamp) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (season_id, player_id, target_row['id'], score, distance, timestamp)
+                ).lastrowid
+                improved = conn.execute(
+                    'INSERT INTO player_bests (season_id, player_id, attempt_id, distance) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (season_id, player_id) DO UPDATE '
+                    'SET attempt_id = excluded.attempt_id, distance = excluded.distance '
+                    'WHERE excluded.distance < player_bests.distance',
+                    (season_id, player_id, attempt_id, distance)
+                ).rowcount
+                conn.execute(
+                    'INSERT INTO player_totals (season_id, player_id, attempts, total_score, best_score) '
+                    'VALUES (?, ?, 1, ?, ?) '
+                    'ON CONFLICT (season_id, player_id) DO UPDATE '
+                    'SET attempts = attempts + 1, total_score = total_score + excluded.total_score, '
+                    'best_score = MAX(best_score, excluded.best_score)',
+                    (season_id, player_id, score, score)
+                )
+                conn.execute(
+                    'INSERT INTO season_totals (season_id, attempts, total_score, min_score, max_score) '
+                    'VALUES (?, 1, ?, ?, ?) '
+                    'ON CONFLICT (season_id) DO UPDATE '
+                    'SET attempts = attempts + 1, total_score = total_score + excluded.total_score, '
+                    'min_score = MIN(min_score, excluded.min_score), max_score = MAX(max_score, excluded.max_score)',
+                    (season_id, score, score, score)
+                )
+
+                attempt = {
+                    'score': score,
+                    'timestamp': timestamp,
+                    'distance': distance,
+                    'target': target
+                }
+                change = {
+                    'initials': initials,
+                    'attempt': attempt,
+                    'entry': {
+                        'initials': initials,
+                        'score': score,
+                        'distance': distance,
+                        'timestamp': timestamp
+                    } if improved else None
+                }
+                self._record_change(conn, 'attempt', change)
+                changes.append(change)
+
+        for change in changes:
+            self._notify('attempt', change)
+        return [change['attempt'] for change in changes]
+
+    def get_leaderboard(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        conn = self._conn()
+        rows = conn.execute(LEADERBOARD_SQL, {
+            'season': self._season_id(conn),
+            'limit': -1 if limit is None else limit,
+            'offset': offset
+        }).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_leaderboard_count(self) -> int:
+        conn = self._conn()
+        return conn.execute(
+            'SELECT COUNT(*) FROM player_bests WHERE season_id = ?', (self._season_id(conn),)
+        ).fetchone()[0]
+
+    def get_player_stats(self, initials: str, limit: Optional[int] = None,
+                         before: Optional[int] = None) -> Dict:
+        """See PinPuttDB.get_player_stats; here the cursor is an attempt id."""
+        conn = self._conn()
+        season_id = self._season_id(conn)
+        summary = conn.execute(
+            'SELECT s.player_id, s.attempts, s.total_score, s.best_score, b.distance AS best_distance '
+            'FROM players p '
+            'JOIN player_totals s ON s.player_id = p.id AND s.season_id = ? '
+            'JOIN player_bests b ON b.player_id = p.id AND b.season_id = s.season_id '
+            'WHERE p.initials = ?',
+            (season_id, initials)
+        ).fetchone()
+        if summary is None:
+            return {
+                'total_attempts': 0,
+                'best_score': 0,
+                'average_score': 0,
+                'best_distance': 0,
+                'attempts': [],
+                'next_before': None
+            }
+
+        rows = conn.execute(PLAYER_ATTEMPTS_SQL, {
+            'season': season_id,
+            'player': summary['player_id'],
+            'before': sys.maxsize if before is None else before,
+            # One extra row tells whether there is an older page
+            'limit': -1 if limit is None else limit + 1
+        }).fetchall()
+        more = limit is not None and len(rows) > limit
+        rows = rows[:limit] if more else rows
+        attempts = [dict(row) for row in rows]
+        for attempt in attempts:
+            del attempt['id']
+        return {
+            'total_attempts': summary['attempts'],
+            'best_score': summary['best_score'],
+            'average_score': int(summary['total_score'] / summary['attempts']),
+            'best_distance': summary['best_distance'],
+            'attempts': attempts,
+            'next_before': rows[-1]['id'] if more else None
+        }
+
+    def get_current_target(self) -> Optional[int]:
+        conn = self._conn()
+        row = self._current_target_row(conn, self._season_id(conn))
+        return row['score'] if row else None
+
+    def reset_scores(self) -> str:
+        now = datetime.now()
+        archive_name = f'closedscores_{now.strftime("%Y%m%d_%H%M%S")}'
+        with self._write() as conn:
+            season_id = self._season_id(conn)
+            target_row = self._current_target_row(conn, season_id)
+            conn.execute(
+                'UPDATE seasons SET closed_at = ?, archive_name = ? WHERE id = ?',
+                (now.isoformat(), archive_name, season_id)
+            )
+            new_season_id = conn.execute('INSERT INTO seasons (opened_at) VALUES (?)', (now.isoformat(),)).lastrowid
+            if target_row is not None:
+                conn.execute(
+                    'INSERT INTO targets (season_id, score, set_at) VALUES (?, ?, ?)',
+                    (new_season_id, target_row['score'], now.isoformat())
+                )
+            change = {'target': target_row['score'] if target_row else None}
+            self._record_change(conn, 'reset', change)
+        self._notify('reset', change)
+        return archive_name
+
+    def archives(self) -> List[Tuple[str, str]]:
+        """(archive, closed_at) of every closed season, oldest first."""
+        return [(row['archive_name'], row['closed_at']) for row in self._conn().execute(
+            'SELECT archive_name, closed_at FROM seasons WHERE closed_at IS NOT NULL ORDER BY id'
+        )]
+
+    def archive_summary(self, archive: str) -> Dict[str, Dict]:
+        """Best attempt and attempt count per player in a closed season."""
+        conn = self._conn()
+        season = conn.execute('SELECT id FROM seasons WHERE archive_name = ?', (archive,)).fetchone()
+        if season is None:
+            raise ValueError(f"No archived season named {archive}")
+        return {row['initials']: {
+            'score': row['score'],
+            'distance': row['distance'],
+            'timestamp': row['timestamp'],
+            'target': row['target'],
+            'total_attempts': row['total_attempts']
+        } for row in conn.execute(TOP_PLAYERS_SQL, {'season': season['id']})}
+
+    def get_enhanced_stats(self) -> Dict:
+        conn = self._conn()
+        season_id = self._season_id(conn)
+        totals = conn.execute(
+            'SELECT attempts, total_score, min_score, max_score FROM season_totals WHERE season_id = ?',
+            (season_id,)
+        ).fetchone()
+        stats = {
+            'total_attempts': 0,
+            'unique_players': conn.execute(
+                'SELECT COUNT(*) FROM player_totals WHERE season_id = ?', (season_id,)
+            ).fetchone()[0],
+            'average_score': 0,
+            'best_score': 0,
+            'top_players': [],
+            'score_distribution': [],
+            'distance_percentiles': {f'p{pct}': None for pct in DISTANCE_PERCENTILES}
+        }
+        if totals is None:
+            return stats
+
+        count = totals['attempts']
+        bounds = score_band_bounds(totals['min_score'], totals['max_score'], count)
+        # [lower, upper), as ScoreStats counts them with bisect
+        band_counts = [conn.execute(
+            'SELECT COUNT(*) FROM attempts WHERE season_id = ? AND score >= ? AND score < ?',
+            (season_id, lower, upper)
+        ).fetchone()[0] for lower, upper in bounds]
+        percentiles = {}
+        for pct in DISTANCE_PERCENTILES:
+            rank = min(count - 1, max(0, math.ceil(count * pct / 100) - 1))
+            percentiles[f'p{pct}'] = conn.execute(
+                'SELECT distance FROM attempts WHERE season_id = ? ORDER BY distance LIMIT 1 OFFSET ?',
+                (season_id, rank)
+            ).fetchone()[0]
+        stats.update({
+            'total_attempts': count,
+            'average_score': int(totals['total_score'] / count),
+            'best_score': totals['max_score'],
+            'score_distribution': format_score_bands(bounds, band_counts, count),
+            'distance_percentiles': percentiles,
+            'top_players': [{
+                'initials': row['initials'],
+                'best_score': row['score'],
+                'distance': row['distance'],
+                'total_attempts': row['total_attempts']
+            } for row in conn.execute(TOP_PLAYERS_SQL, {'season': season_id})]
+        })
+        return stats
+
+    def migrate_json(self, data_dir: str) -> int:
+        """One-shot import of closedscores_*.json archives and scores.json.
+
+        Archives become closed seasons in chronological order and scores.json
+        becomes the open season. Returns the number of attempts imported.
+        """
+        with self._write() as conn:
+            if conn.execute('SELECT 1 FROM attempts LIMIT 1').fetchone() is not None:
+                raise ValueError(f"{self.db_file} already contains attempts")
+            conn.execute('DELETE FROM targets')
+            conn.execute('DELETE FROM seasons')
+
+            imported = 0
+            archives = sorted(glob.glob(os.path.join(data_dir, 'closedscores_*.json')))
+            for archive_file in archives:
+                archive_name = os.path.splitext(os.path.basename(archive_file))[0]
+                closed_at = datetime.strptime(archive_name[len('closedscores_'):], '%Y%m%d_%H%M%S').isoformat()
+                imported += self._import_season(conn, load_snapshot(archive_file), closed_at, archive_name)
+
+            scores_file = os.path.join(data_dir, 'scores.json')
+            if os.path.exists(scores_file):
+                imported += self._import_season(conn, load_snapshot(scores_file), None, None)
+            else:
+                conn.execute('INSERT INTO seasons (opened_at) VALUES (?)', (datetime.now().isoformat(),))
+            self._record_change(conn, 'reload', {})
+        self._notify('reload', {})
+        return imported
+
+    def _import_season(self, conn, data: Dict, closed_at: Optional[str], archive_name: Optional[str]) -> int:
+        attempts = sorted(
+            iter_attempts(data['players']),
+            key=lambda item: item[1]['timestamp']
+        )
+        opened_at = attempts[0][1]['timestamp'] if attempts else (closed_at or datetime.now().isoformat())
+        season_id = conn.execute(
+            'INSERT INTO seasons (opened_at, closed_at, archive_name) VALUES (?, ?, ?)',
+            (opened_at, closed_at, archive_name)
+        ).lastrowid
+
+        target_id = None
+        target_score = None
+        rows = []
+        for initials, attempt in attempts:
+            if target_id is None or attempt['target'] != target_score:
+                target_score = attempt['target']
+                target_id = conn.execute(
+                    'INSERT INTO targets (season_id, score, set_at) VALUES (?, ?, ?)',
+                    (season_id, target_score, attempt['timestamp'])
+                ).lastrowid
+            conn.execute('INSERT OR IGNORE INTO players (initials) VALUES (?)', (initials,))
+            player_id = conn.execute('SELECT id FROM players WHERE initials = ?', (initials,)).fetchone()['id']
+            rows.append((season_id, player_id, target_id, attempt['score'], attempt['distance'], attempt['timestamp']))
+
+        conn.executemany(
+            'INSERT INTO attempts (season_id, player_id, target_id, score, distance, timestamp) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            rows
+        )
+        conn.execute(REBUILD_BESTS_SQL, (season_id,))
+        conn.execute(REBUILD_TOTALS_SQL, (season_id,))
+        conn.execute(REBUILD_SEASON_TOTALS_SQL, (season_id,))
+        if data.get('current_target') is not None and data['current_target'] != target_score:
+            conn.execute(
+                'INSERT INTO targets (season_id, score, set_at) VALUES (?, ?, ?)',
+                (season_id, data['current_target'], closed_at or datetime.now().isoformat())
+            )
+        return len(rows)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, so concurrent writers queue on the write lock."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.started = 0.0
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.started = time.perf_counter()
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        # Includes waiting for the write lock, so contention shows up here
+        record_stage('storage_save', time.perf_counter() - self.started)
+
+
+if __name__ == '__main__':
+    # python sqlite_db.py migrate <data_dir> <db_file>
+    if len(sys.argv) != 4 or sys.argv[1] != 'migrate':
+        print('usage: python sqlite_db.py migrate <data_dir> <db_file>')
+        sys.exit(2)
+    count = SQLitePinPuttDB(sys.argv[3]).migrate_json(sys.argv[2])
+    print(f'Imported {count} attempts into {sys.argv[3]}')
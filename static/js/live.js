@@ -0,0 +1,55 @@
+// live.js
+// Subscribes to /api/leaderboard/stream and falls back to polling when the
+// browser lacks EventSource or the server refuses the stream (connection cap).
+
+// Carries the page's ?event= over to an API URL, so one page serves every event
+function withEvent(url) {
+    const event = new URLSearchParams(window.location.search).get('event');
+    if (!event) {
+        return url;
+    }
+    return `${url}${url.includes('?') ? '&' : '?'}event=${encodeURIComponent(event)}`;
+}
+
+function subscribeToChanges(handlers, poll, pollInterval = 30000) {
+    let pollTimer = null;
+
+    function startPolling() {
+        if (!pollTimer) {
+            poll();
+            pollTimer = setInterval(poll, pollInterval);
+        }
+    }
+
+    function stopPolling() {
+        clearInterval(pollTimer);
+        pollTimer = null;
+    }
+
+    function connect() {
+        if (!window.EventSource) {
+            startPolling();
+            return;
+        }
+        const source = new EventSource(withEvent('/api/leaderboard/stream'));
+        // Resync on every (re)connect; changes made while disconnected are unknown
+        source.onopen = () => {
+            stopPolling();
+            poll();
+        };
+        ['attempt', 'target', 'reset', 'reload'].forEach(kind => {
+            source.addEventListener(kind, event => {
+                const handler = handlers[kind] || poll;
+                handler(JSON.parse(event.data));
+            });
+        });
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED) {
+                startPolling();
+                setTimeout(connect, 60000);
+            }
+        };
+    }
+
+    connect();
+}
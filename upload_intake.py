@@ -0,0 +1,101 @@
+# upload_intake.py
+import os
+import tempfile
+import warnings
+from typing import Optional, Tuple
+
+from PIL import Image, UnidentifiedImageError
+
+# Leading bytes of the formats a score photo may be in
+IMAGE_SIGNATURES = {
+    'JPEG': b'\xff\xd8\xff',
+    'PNG': b'\x89PNG\r\n\x1a\n'
+}
+SIGNATURE_BYTES = max(len(signature) for signature in IMAGE_SIGNATURES.values())
+
+
+class UploadRejected(Exception):
+    """An upload refused at intake, with the HTTP status to answer it with.
+
+    Not a ValueError: Werkzeug's form parser would swallow one raised mid-stream.
+    """
+
+    def __init__(self, message: str, status: int = 400, reason: str = 'invalid'):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+
+
+class ImageUploadBuffer:
+    """Spill buffer for one uploaded photo that checks it as it streams in.
+
+    The form parser writes each chunk here as it arrives, so a file that
+    does not start like a JPEG or PNG, or grows past max_bytes, is refused
+    without reading the rest of the request. Bytes stay in memory up to
+    spool_bytes, then move to an anonymous temp file in spill_dir that no
+    other upload can see and that is gone once the request closes it.
+    """
+
+    def __init__(self, max_bytes: int, spool_bytes: int, spill_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._head = b''
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_bytes, prefix='upload-', dir=spill_dir)
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadRejected('Image too large', 413, 'too_large')
+        if len(self._head) < SIGNATURE_BYTES:
+            self._head += bytes(data[:SIGNATURE_BYTES - len(self._head)])
+            check_signature(self._head)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+def check_signature(head: bytes) -> None:
+    """Reject head unless it is, or could grow into, a known image signature."""
+    if not any(signature[:len(head)] == head[:len(signature)] for signature in IMAGE_SIGNATURES.values()):
+        raise UploadRejected('Invalid file type', 400, 'not_image')
+
+
+def upload_stream(filename: Optional[str], image_extensions, max_bytes: int, spool_bytes: int,
+                  spill_dir: Optional[str] = None):
+    """Werkzeug file stream for one multipart part: checked if it is named as a
+    photo, a plain spill file otherwise (e.g. a batch zip)."""
+    extension = os.path.splitext(filename or '')[1][1:].lower()
+    if extension in image_extensions:
+        return ImageUploadBuffer(max_bytes, spool_bytes, spill_dir)
+    return tempfile.SpooledTemporaryFile(max_size=spool_bytes, prefix='upload-', dir=spill_dir)
+
+
+def inspect_image(stream, max_pixels: int) -> Tuple[str, int, int]:
+    """(format, width, height) from the image header, without decoding pixels.
+
+    Raises UploadRejected for anything that is not a JPEG or PNG, and for
+    images over max_pixels, which would otherwise be decompressed in full
+    by the OCR worker.
+    """
+    stream.seek(0)
+    try:
+        with warnings.catch_warnings():
+            # Pillow warns past its own limit; ours is lower and checked below
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            with Image.open(stream) as img:
+                image_format, (width, height) = img.format, img.size
+    except Image.DecompressionBombError:
+        raise UploadRejected('Image dimensions too large', 413, 'too_many_pixels')
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        raise UploadRejected('Invalid image', 400, 'not_image')
+    finally:
+        stream.seek(0)
+    if image_format not in IMAGE_SIGNATURES:
+        raise UploadRejected('Invalid file type', 400, 'not_image')
+    if width * height > max_pixels:
+        raise UploadRejected('Image dimensions too large', 413, 'too_many_pixels')
+    return image_format, width, height